@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Article, Presentation, Slide, Image, Annotation, AnnotationReply, Quiz, Question, Answer, QuizAttempt, QuestionResponse,GlossaryTerm, HistoricalEvent, PageView,Interaction, Reaction, DiscussionTopic, DiscussionPost, StudentProgress, AIGeneratedContent, CollaborativeNote
+from .models import Article, Presentation, Slide, Image, Annotation, AnnotationReply, Quiz, Question, Answer, QuizAttempt, QuestionResponse,GlossaryTerm, HistoricalEvent, PageView,Interaction, Reaction, DiscussionTopic, DiscussionPost, StudentProgress, AIGeneratedContent, CollaborativeNote, CollaborativeNotePatch, ReactionCounter, QuizDailyRollup, StudentDailyRollup, AnnotationDailyRollup, PageViewDailyRollup, QuizItemAnalysis, QuestionItemStats, ImageVariant
 # Register your models here.
 admin.site.register(Article)
 admin.site.register(Presentation)
@@ -17,8 +17,17 @@ admin.site.register(HistoricalEvent)
 admin.site.register(PageView)
 admin.site.register(Interaction)
 admin.site.register(Reaction)
+admin.site.register(ReactionCounter)
 admin.site.register(DiscussionTopic)
 admin.site.register(DiscussionPost)
 admin.site.register(StudentProgress)
 admin.site.register(AIGeneratedContent)
-admin.site.register(CollaborativeNote)
\ No newline at end of file
+admin.site.register(CollaborativeNote)
+admin.site.register(CollaborativeNotePatch)
+admin.site.register(QuizDailyRollup)
+admin.site.register(StudentDailyRollup)
+admin.site.register(AnnotationDailyRollup)
+admin.site.register(PageViewDailyRollup)
+admin.site.register(QuizItemAnalysis)
+admin.site.register(QuestionItemStats)
+admin.site.register(ImageVariant)
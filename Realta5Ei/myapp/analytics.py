@@ -0,0 +1,164 @@
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+
+from .models import Question, QuestionItemStats, QuestionResponse, QuizAttempt, QuizItemAnalysis
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = np.linspace(0, 100, 11)
+
+
+def summarize(values):
+    if values.size == 0:
+        return {'mean': None, 'std': None, 'percentiles': {f'p{p}': None for p in PERCENTILES}}
+    return {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'percentiles': dict(zip((f'p{p}' for p in PERCENTILES), np.percentile(values, PERCENTILES).tolist()))
+    }
+
+
+def score_distribution(quiz_id, passing_score):
+    rows = list(QuizAttempt.objects.filter(quiz_id=quiz_id).order_by().values_list(
+        'percentage', 'time_taken', 'class_group'
+    ))
+    if rows:
+        percentages, times, class_groups = zip(*rows)
+    else:
+        percentages, times, class_groups = (), (), ()
+
+    percentages = np.asarray(percentages, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    passed = percentages >= passing_score
+    counts, edges = np.histogram(np.clip(percentages, 0, 100), bins=HISTOGRAM_BINS)
+
+    classes, class_index = np.unique(np.asarray(class_groups, dtype=object), return_inverse=True)
+    class_counts = np.bincount(class_index, minlength=len(classes))
+    class_sums = np.bincount(class_index, weights=percentages, minlength=len(classes))
+    class_passed = np.bincount(class_index, weights=passed, minlength=len(classes))
+    by_class = np.split(percentages[np.argsort(class_index, kind='stable')], np.cumsum(class_counts)[:-1])
+
+    return {
+        'quiz_id': quiz_id,
+        'attempts': int(percentages.size),
+        'passing_score': passing_score,
+        'pass_rate': float(passed.mean()) if percentages.size else None,
+        'scores': summarize(percentages),
+        'time_taken': summarize(times),
+        'histogram': {
+            'edges': edges.tolist(),
+            'counts': counts.tolist()
+        },
+        'classes': [
+            {
+                'class_group': classes[i],
+                'attempts': int(class_counts[i]),
+                'mean': float(class_sums[i] / class_counts[i]),
+                'median': float(np.median(by_class[i])),
+                'pass_rate': float(class_passed[i] / class_counts[i])
+            }
+            for i in range(len(classes))
+        ]
+    }
+
+
+def update_item_analysis(quiz_id):
+    """
+    Fold the attempts submitted since the last run into the quiz's item
+    statistics and recompute difficulty, item-rest point-biserial
+    discrimination and Cronbach's alpha from the running sums.
+
+    Items are scored 0/1 from QuestionResponse.is_correct (unanswered counts
+    as 0) and an attempt's total is its number of correct items, so only
+    the new attempts' responses are ever loaded.
+    """
+    # Check the high-water mark first so a run with nothing to fold does not
+    # take the write lock (atomic blocks BEGIN IMMEDIATE).
+    analysis = QuizItemAnalysis.objects.filter(quiz_id=quiz_id).first()
+    if analysis is not None and not QuizAttempt.objects.filter(
+        quiz_id=quiz_id, id__gt=analysis.last_attempt_id
+    ).exists():
+        return analysis
+
+    with transaction.atomic():
+        analysis, _ = QuizItemAnalysis.objects.get_or_create(quiz_id=quiz_id)
+        attempt_ids = list(QuizAttempt.objects.filter(
+            quiz_id=quiz_id, id__gt=analysis.last_attempt_id
+        ).order_by('id').values_list('id', flat=True))
+        if not attempt_ids:
+            return analysis
+
+        question_ids = list(Question.objects.filter(quiz_id=quiz_id).order_by('order', 'id').values_list('id', flat=True))
+        stats = {s.question_id: s for s in QuestionItemStats.objects.filter(question_id__in=question_ids)}
+        for question_id in question_ids:
+            stats.setdefault(question_id, QuestionItemStats(question_id=question_id))
+
+        responses = list(QuestionResponse.objects.filter(
+            attempt__quiz_id=quiz_id,
+            attempt_id__gt=analysis.last_attempt_id,
+            attempt_id__lte=attempt_ids[-1],
+            question_id__in=question_ids
+        ).values_list('attempt_id', 'question_id', 'selected_answer_id', 'is_correct'))
+
+        attempt_index = {attempt_id: i for i, attempt_id in enumerate(attempt_ids)}
+        question_index = {question_id: j for j, question_id in enumerate(question_ids)}
+        matrix = np.zeros((len(attempt_ids), len(question_ids)))
+        if responses:
+            rows, columns, correct = zip(*(
+                (attempt_index[attempt_id], question_index[question_id], is_correct)
+                for attempt_id, question_id, _, is_correct in responses
+            ))
+            matrix[np.asarray(rows), np.asarray(columns)] = np.asarray(correct, dtype=np.float64)
+
+        answer_counts = Counter(
+            (question_id, answer_id) for _, question_id, answer_id, _ in responses if answer_id is not None
+        )
+
+        totals = matrix.sum(axis=1)
+        item_correct = matrix.sum(axis=0)
+        item_total = matrix.T @ totals
+
+        analysis.last_attempt_id = attempt_ids[-1]
+        analysis.attempts_count += len(attempt_ids)
+        analysis.total_sum += float(totals.sum())
+        analysis.total_squares_sum += float((totals ** 2).sum())
+
+        for question_id, j in question_index.items():
+            item = stats[question_id]
+            item.correct_count += int(item_correct[j])
+            item.correct_total_sum += float(item_total[j])
+        for (question_id, answer_id), count in answer_counts.items():
+            counts = stats[question_id].answer_counts
+            counts[str(answer_id)] = counts.get(str(answer_id), 0) + count
+
+        n = analysis.attempts_count
+        p = np.array([stats[q].correct_count for q in question_ids], dtype=np.float64) / n
+        item_variance = p * (1 - p)
+        mean_total = analysis.total_sum / n
+        total_variance = analysis.total_squares_sum / n - mean_total ** 2
+        item_total_covariance = np.array([stats[q].correct_total_sum for q in question_ids]) / n - p * mean_total
+        rest_covariance = item_total_covariance - item_variance
+        rest_variance = total_variance + item_variance - 2 * item_total_covariance
+        denominator = np.sqrt(item_variance * rest_variance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discrimination = np.where(denominator > 1e-12, rest_covariance / denominator, np.nan)
+
+        k = len(question_ids)
+        if k > 1 and total_variance > 1e-12:
+            analysis.cronbach_alpha = float(k / (k - 1) * (1 - item_variance.sum() / total_variance))
+        else:
+            analysis.cronbach_alpha = None
+        analysis.save()
+
+        for question_id, j in question_index.items():
+            item = stats[question_id]
+            item.difficulty = float(p[j])
+            item.discrimination = None if np.isnan(discrimination[j]) else float(discrimination[j])
+        QuestionItemStats.objects.bulk_create(
+            stats.values(),
+            update_conflicts=True,
+            unique_fields=['question'],
+            update_fields=['correct_count', 'correct_total_sum', 'answer_counts', 'difficulty', 'discrimination']
+        )
+        return analysis
@@ -0,0 +1,92 @@
+import csv
+import gzip
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import Interaction, PageView
+
+ARCHIVED_MODELS = {
+    'pageview': PageView,
+    'interaction': Interaction,
+}
+
+
+def archive_path(model, month):
+    return Path(settings.TELEMETRY_ARCHIVE_DIR) / model._meta.model_name / f'{month}.csv.gz'
+
+
+def archive_before(model, cutoff, batch_size=5000):
+    """
+    Move rows with ``timestamp < cutoff`` into gzip CSV files, one per
+    month, deleting them from the table batch by batch. Returns the number
+    of rows archived.
+    """
+    fields = [f.attname for f in model._meta.concrete_fields]
+    timestamp_index = fields.index('timestamp')
+    archived = 0
+
+    while True:
+        rows = list(model.objects.filter(timestamp__lt=cutoff).order_by('id').values_list(*fields)[:batch_size])
+        if not rows:
+            return archived
+
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[row[timestamp_index].strftime('%Y-%m')].append(row)
+
+        for month, month_rows in by_month.items():
+            path = archive_path(model, month)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not path.exists()
+            # Appending opens a new gzip member; readers see one continuous stream.
+            with gzip.open(path, 'at', newline='', encoding='utf-8') as archive_file:
+                writer = csv.writer(archive_file)
+                if is_new:
+                    writer.writerow(fields)
+                writer.writerows(
+                    ['' if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+                     for value in row]
+                    for row in month_rows
+                )
+
+        model.objects.filter(id__in=[row[0] for row in rows]).delete()
+        archived += len(rows)
+
+
+def iter_archived(model, since=None, until=None, article_id=None):
+    """
+    Yield archived rows as dicts, oldest month first, optionally restricted
+    to ``since <= timestamp < until`` and to one article. Months outside
+    the range are skipped without being opened.
+    """
+    directory = Path(settings.TELEMETRY_ARCHIVE_DIR) / model._meta.model_name
+    if not directory.exists():
+        return
+
+    fields = {f.attname: f for f in model._meta.concrete_fields}
+    for path in sorted(directory.glob('*.csv.gz')):
+        month = path.name[:7]
+        if since is not None and month < since.strftime('%Y-%m'):
+            continue
+        if until is not None and month > until.strftime('%Y-%m'):
+            continue
+
+        seen = set()
+        with gzip.open(path, 'rt', newline='', encoding='utf-8') as archive_file:
+            for raw in csv.DictReader(archive_file):
+                if raw['id'] in seen:
+                    continue
+                seen.add(raw['id'])
+                row = {
+                    name: None if value == '' and fields[name].null else fields[name].to_python(value)
+                    for name, value in raw.items()
+                }
+                if article_id is not None and row['article_id'] != article_id:
+                    continue
+                if since is not None and row['timestamp'] < since:
+                    continue
+                if until is not None and row['timestamp'] >= until:
+                    continue
+                yield row
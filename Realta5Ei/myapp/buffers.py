@@ -0,0 +1,172 @@
+import abc
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from .models import StudentProgress
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer(abc.ABC):
+    """
+    Accumulates writes in process memory and flushes them in bulk, either
+    from a background thread every ``flush_interval`` seconds or inline as
+    soon as ``max_pending`` keys are waiting. Each flush is one transaction
+    on the ``using`` database alias.
+    """
+
+    def __init__(self, flush_interval=2.0, max_pending=500, using=None):
+        self.flush_interval = flush_interval
+        self.using = using
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        atexit.register(self._flush_logged)
+
+    @abc.abstractmethod
+    def merge(self, current, value):
+        """Combine the pending value for a key (None if there is none) with a new one."""
+
+    @abc.abstractmethod
+    def write(self, batch):
+        """Write a ``{key: merged value}`` batch; runs inside the flush transaction."""
+
+    def add(self, key, value):
+        with self._lock:
+            merged = self._pending[key] = self.merge(self._pending.get(key), value)
+            full = len(self._pending) >= self.max_pending
+        self._ensure_thread()
+        if full:
+            # The value is already buffered and a failed flush keeps it pending,
+            # so the request succeeds either way.
+            self._flush_logged()
+        return merged
+
+    def pending(self, key, default=None):
+        with self._lock:
+            return self._pending.get(key, default)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                with transaction.atomic(using=self.using):
+                    self.write(batch)
+            except Exception:
+                with self._lock:
+                    for key, value in batch.items():
+                        self._pending[key] = self.merge(value, self._pending[key]) if key in self._pending else value
+                raise
+            return len(batch)
+
+    def _flush_logged(self):
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('Flushing %s failed, keeping %d pending entries', type(self).__name__, len(self._pending))
+            return 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self._flush_logged()
+            finally:
+                connections.close_all()
+
+
+class CounterBuffer(WriteBuffer):
+    """Buffers ``+= delta`` updates to an integer column, keyed by primary key."""
+
+    def __init__(self, model, field, **kwargs):
+        kwargs.setdefault('using', router.db_for_write(model))
+        super().__init__(**kwargs)
+        self.model = model
+        self.field = field
+
+    def merge(self, current, value):
+        return (current or 0) + value
+
+    def pending(self, key, default=0):
+        return super().pending(key, default)
+
+    def write(self, batch):
+        by_delta = defaultdict(list)
+        for pk, delta in batch.items():
+            if delta:
+                by_delta[delta].append(pk)
+        for delta, pks in by_delta.items():
+            self.model.objects.filter(pk__in=pks).update(**{self.field: F(self.field) + delta})
+
+
+class ProgressBuffer(WriteBuffer):
+    """
+    Coalesces progress heartbeats per (student_name, class_group, article_id):
+    time increments are summed and the latest completion percentage wins.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('using', router.db_for_write(StudentProgress))
+        super().__init__(**kwargs)
+
+    def merge(self, current, value):
+        if current is None:
+            return dict(value)
+        return {
+            'completion_percentage': value['completion_percentage'],
+            'time_spent': current['time_spent'] + value['time_spent'],
+            'last_accessed': max(current['last_accessed'], value['last_accessed'])
+        }
+
+    def pending_for(self, student_name, class_group):
+        with self._lock:
+            return {
+                key[2]: dict(value)
+                for key, value in self._pending.items()
+                if key[0] == student_name and key[1] == class_group
+            }
+
+    def write(self, batch):
+        existing = {
+            row[:3]: row[3]
+            for row in StudentProgress.objects.filter(
+                student_name__in={key[0] for key in batch},
+                class_group__in={key[1] for key in batch},
+                article_id__in={key[2] for key in batch}
+            ).values_list('student_name', 'class_group', 'article_id', 'time_spent')
+        }
+
+        StudentProgress.objects.bulk_create(
+            [
+                StudentProgress(
+                    student_name=student_name,
+                    class_group=class_group,
+                    article_id=article_id,
+                    completion_percentage=value['completion_percentage'],
+                    time_spent=existing.get((student_name, class_group, article_id), 0) + value['time_spent'],
+                    last_accessed=value['last_accessed']
+                )
+                for (student_name, class_group, article_id), value in batch.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student_name', 'class_group', 'article'],
+            update_fields=['completion_percentage', 'time_spent', 'last_accessed']
+        )
@@ -0,0 +1,154 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+ARTICLES = 'articles'
+QUIZZES = 'quizzes'
+GLOSSARY = 'glossary'
+TIMELINE = 'timeline'
+
+DASHBOARD = 'dashboard'
+
+HOMEPAGE_NAMESPACES = (ARTICLES, QUIZZES, GLOSSARY, TIMELINE)
+HOMEPAGE_TIMEOUT = 60 * 60
+CONTENT_TIMEOUT = 60 * 60
+DASHBOARD_TIMEOUT = 30
+ANALYTICS_TIMEOUT = 60 * 10
+
+# Names passed to cache_view, for cache_stats().
+VIEW_CACHES = set()
+
+
+def _namespace_key(namespace):
+    return 'ns:%s' % namespace
+
+
+def reactions_namespace(article_id):
+    return 'reactions:%s' % article_id
+
+
+def quiz_attempts_namespace(quiz_id):
+    return 'quiz-attempts:%s' % quiz_id
+
+
+def dashboard_namespace(class_group):
+    return 'dashboard:%s' % hashlib.md5(class_group.encode()).hexdigest()
+
+
+def get_versions(*namespaces):
+    keys = [_namespace_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        for key, stamp in missing.items():
+            if not cache.add(key, stamp, None):
+                stamp = cache.get(key, stamp)
+            found[key] = stamp
+    return [found[key] for key in keys]
+
+
+def bump(*namespaces):
+    now = time.time()
+    cache.set_many({_namespace_key(ns): now for ns in namespaces}, None)
+
+
+def invalidate_dashboard(*class_groups):
+    """
+    Drop the cached teacher dashboards affected by new activity: the given
+    classes plus the "all" view, or every dashboard when no class is given.
+    """
+    if class_groups:
+        bump(*(dashboard_namespace(c) for c in set(class_groups) | {'all'}))
+    else:
+        bump(DASHBOARD)
+
+
+def versioned_key(prefix, *namespaces):
+    versions = get_versions(*namespaces)
+    return '%s:%s' % (prefix, ':'.join('%s=%r' % pair for pair in zip(namespaces, versions)))
+
+
+def _resolve(namespaces, kwargs):
+    return [ns(**kwargs) if callable(ns) else ns for ns in namespaces]
+
+
+def conditional_on(*namespaces):
+    """
+    Answer If-None-Match / If-Modified-Since with a 304 when none of the
+    given namespaces has been bumped since the client's copy.
+
+    Each namespace is either a string or a callable receiving the view's
+    URL kwargs, for stamps scoped to a single object.
+    """
+    def etag(request, **kwargs):
+        versions = get_versions(*_resolve(namespaces, kwargs))
+        return hashlib.md5(repr(versions).encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        return datetime.fromtimestamp(max(get_versions(*_resolve(namespaces, kwargs))), tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _count(name, outcome):
+    key = 'stats:%s:%s' % (name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_view(name, *namespaces, timeout=CONTENT_TIMEOUT, params=()):
+    """
+    Serve GET responses from the cache until one of ``namespaces`` (as in
+    conditional_on) is bumped. Only plain 200 responses are stored, keyed by
+    the path and the query ``params`` the view reads, such as cursors; any
+    other query string is ignored, so junk parameters can't flood the cache.
+    """
+    VIEW_CACHES.add(name)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            query = urlencode([(param, request.GET[param]) for param in params if param in request.GET])
+            path = hashlib.md5(('%s?%s' % (request.path, query)).encode()).hexdigest()
+            key = versioned_key('view:%s:%s' % (name, path), *_resolve(namespaces, kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                _count(name, 'hits')
+                content_type, content = cached
+                return HttpResponse(content, content_type=content_type)
+
+            _count(name, 'misses')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response['Content-Type'], response.content), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    counts = cache.get_many(
+        ['stats:%s:%s' % (name, outcome) for name in VIEW_CACHES for outcome in ('hits', 'misses')]
+    )
+    stats = {}
+    for name in sorted(VIEW_CACHES):
+        hits = counts.get('stats:%s:hits' % name, 0)
+        misses = counts.get('stats:%s:misses' % name, 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else None
+        }
+    return stats
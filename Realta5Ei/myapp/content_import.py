@@ -0,0 +1,256 @@
+import json
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+
+from . import caching
+from .models import Answer, Article, GlossaryTerm, HistoricalEvent, Image, Presentation, Question, Quiz, Slide
+from .quiz_cache import invalidate_quiz
+from .signals import rebuild_source_text
+
+# Content models the importer upserts, in foreign-key order, with the fields
+# that identify a row independently of its primary key.
+NATURAL_KEYS = {
+    Article: ('article_title', 'pdf'),
+    Presentation: ('article', 'title'),
+    Slide: ('presentation', 'slide_number'),
+    Image: ('slide', 'image_number'),
+    GlossaryTerm: ('term',),
+    HistoricalEvent: ('date', 'title'),
+    Quiz: ('article', 'title'),
+    Question: ('quiz', 'text'),
+    Answer: ('question', 'text'),
+}
+
+BATCH_SIZE = 500
+
+CHUNK_SIZE = 1 << 16
+
+
+class FixtureError(Exception):
+    pass
+
+
+def iter_fixture(stream, chunk_size=CHUNK_SIZE):
+    """Yield the objects of a JSON fixture (a top-level array) without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != '[':
+                    raise FixtureError('A fixture must be a JSON array')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise FixtureError('Malformed fixture near character %d' % position)
+            else:
+                yield obj
+                continue
+        elif eof:
+            raise FixtureError('Unexpected end of fixture')
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+class ContentImporter:
+    """
+    Upsert content fixtures by natural key: rows are matched against the
+    database by NATURAL_KEYS, new ones are bulk created and changed ones bulk
+    updated, so re-importing an unchanged fixture writes nothing. Fixture
+    primary keys are only used to resolve references inside the fixture.
+    """
+
+    def __init__(self):
+        self.pk_map = defaultdict(dict)
+        self.stats = defaultdict(Counter)
+        self.skipped = Counter()
+        self.touched = defaultdict(set)
+
+    def run(self, objects):
+        rows = defaultdict(list)
+        for obj in objects:
+            try:
+                model = apps.get_model(obj['model'])
+            except (KeyError, LookupError, ValueError):
+                raise FixtureError('Unknown model in fixture: %r' % obj.get('model'))
+            if model in NATURAL_KEYS:
+                rows[model].append(obj)
+            else:
+                self.skipped[model._meta.label_lower] += 1
+
+        with transaction.atomic():
+            for model in NATURAL_KEYS:
+                if rows[model]:
+                    self.upsert(model, sorted(rows[model], key=lambda row: row.get('pk') or 0))
+            transaction.on_commit(self.invalidate)
+        return self.stats
+
+    def resolve(self, field, value):
+        if value is None:
+            return None
+        related = field.related_model
+        if value in self.pk_map[related]:
+            return self.pk_map[related][value]
+        # References outside the fixture must already exist with that primary key.
+        if related._default_manager.filter(pk=value).exists():
+            return value
+        raise FixtureError('%s.%s references missing %s %r' % (
+            field.model._meta.label_lower, field.name, related._meta.label_lower, value
+        ))
+
+    def build(self, model, row):
+        values = {}
+        relations = {}
+        fields = row.get('fields', {})
+        unknown = set(fields) - {field.name for field in model._meta.get_fields()}
+        if unknown:
+            raise FixtureError('%s has no field(s) %s' % (model._meta.label_lower, ', '.join(sorted(unknown))))
+        for field in model._meta.get_fields():
+            if field.name not in fields or field.auto_created or not field.concrete or field.primary_key:
+                continue
+            value = fields[field.name]
+            if field.many_to_many:
+                relations[field] = {self.resolve(field, pk) for pk in value}
+            elif field.many_to_one:
+                values[field.attname] = self.resolve(field, value)
+            else:
+                values[field.attname] = field.to_python(value)
+        return values, relations
+
+    def upsert(self, model, rows):
+        key_fields = [model._meta.get_field(name).attname for name in NATURAL_KEYS[model]]
+        built = []
+        for row in rows:
+            values, relations = self.build(model, row)
+            missing = [name for name in key_fields if name not in values]
+            if missing:
+                raise FixtureError('%s %r lacks natural key field(s) %s' % (
+                    model._meta.label_lower, row.get('pk'), ', '.join(missing)
+                ))
+            built.append((row.get('pk'), tuple(values[name] for name in key_fields), values, relations))
+
+        existing = {}
+        first_values = {key[0] for _, key, _, _ in built}
+        for obj in model._default_manager.filter(**{key_fields[0] + '__in': first_values}).order_by('pk'):
+            existing.setdefault(tuple(getattr(obj, name) for name in key_fields), obj)
+
+        created, changed, changed_fields, instances = [], {}, set(), {}
+        for pk, key, values, relations in built:
+            obj = existing.get(key) or instances.get(key)
+            if obj is None:
+                obj = model(**values)
+                created.append(obj)
+            else:
+                diff = {name for name, value in values.items() if getattr(obj, name) != value}
+                if diff:
+                    for name in diff:
+                        setattr(obj, name, values[name])
+                    if obj.pk is not None:
+                        changed[obj.pk] = obj
+                    changed_fields |= diff
+            instances[key] = obj
+
+        self.create(model, created, key_fields)
+        if changed:
+            model._default_manager.bulk_update(changed.values(), sorted(changed_fields), batch_size=BATCH_SIZE)
+
+        for pk, key, values, relations in built:
+            obj = instances[key]
+            if pk is not None:
+                self.pk_map[model][pk] = obj.pk
+            for field, targets in relations.items():
+                self.set_relation(field, obj, targets)
+
+        self.stats[model._meta.label_lower].update(
+            created=len(created), updated=len(changed), unchanged=len(instances) - len(created) - len(changed)
+        )
+        if created or changed:
+            self.touched[model].update([obj.pk for obj in created], changed)
+
+    def create(self, model, objs, key_fields):
+        if not objs:
+            return
+        # bulk_create runs pre_save, which would overwrite auto_now(_add) values from the fixture.
+        stamped = [
+            f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+        ]
+        stamps = [[getattr(obj, f.attname) for f in stamped] for obj in objs]
+        model._default_manager.bulk_create(objs, batch_size=BATCH_SIZE)
+
+        if any(obj.pk is None for obj in objs):
+            pks = {
+                tuple(values[:-1]): values[-1]
+                for values in model._default_manager.values_list(*key_fields, 'pk').order_by('-pk')
+            }
+            for obj in objs:
+                obj.pk = pks[tuple(getattr(obj, name) for name in key_fields)]
+
+        restore = []
+        for obj, values in zip(objs, stamps):
+            for field, value in zip(stamped, values):
+                if value is not None and value != getattr(obj, field.attname):
+                    setattr(obj, field.attname, value)
+                    restore.append(obj)
+        if restore:
+            model._default_manager.bulk_update(set(restore), [f.attname for f in stamped], batch_size=BATCH_SIZE)
+
+    def set_relation(self, field, obj, targets):
+        through = field.remote_field.through
+        source = field.m2m_field_name() + '_id'
+        target = field.m2m_reverse_field_name() + '_id'
+        current = set(through.objects.filter(**{source: obj.pk}).values_list(target, flat=True))
+        if current - targets:
+            through.objects.filter(**{source: obj.pk, target + '__in': current - targets}).delete()
+        if targets - current:
+            through.objects.bulk_create([through(**{source: obj.pk, target: pk}) for pk in targets - current])
+        if current != targets:
+            self.touched[field.model].add(obj.pk)
+
+    def invalidate(self):
+        # bulk_create and bulk_update bypass the signal handlers, so mirror them here.
+        for presentation_id in set(self.touched[Presentation]) | set(
+            Slide.objects.filter(pk__in=self.touched[Slide]).values_list('presentation_id', flat=True)
+        ):
+            rebuild_source_text(presentation_id)
+
+        quiz_ids = set(self.touched[Quiz])
+        quiz_ids |= set(Question.objects.filter(pk__in=self.touched[Question]).values_list('quiz_id', flat=True))
+        quiz_ids |= set(Answer.objects.filter(pk__in=self.touched[Answer]).values_list('question__quiz_id', flat=True))
+        for quiz_id in quiz_ids:
+            invalidate_quiz(quiz_id)
+
+        namespaces = set()
+        if any(self.touched[model] for model in (Article, Presentation, Slide, Image)):
+            namespaces.add(caching.ARTICLES)
+        if quiz_ids:
+            namespaces.add(caching.QUIZZES)
+        if self.touched[GlossaryTerm]:
+            namespaces.add(caching.GLOSSARY)
+        if self.touched[HistoricalEvent]:
+            namespaces.add(caching.TIMELINE)
+        if namespaces:
+            caching.bump(*namespaces)
+
+
+def import_content(stream):
+    """Import a JSON fixture from ``stream``; returns the importer with its stats."""
+    importer = ContentImporter()
+    importer.run(iter_fixture(stream))
+    return importer
@@ -0,0 +1,128 @@
+import io
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from PIL import Image as PILImage, ImageOps
+
+from .models import ImageVariant
+
+logger = logging.getLogger(__name__)
+
+ENCODERS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+variant_storage = FileSystemStorage(location=settings.IMAGE_VARIANTS_ROOT, base_url=settings.IMAGE_VARIANTS_URL)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    # Pillow releases the GIL while resizing and encoding, so threads run in parallel.
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants'
+                )
+    return _executor
+
+
+def open_source(field_file):
+    """Open an image field's file from its storage, or from static files where slide images live."""
+    if field_file.storage.exists(field_file.name):
+        return field_file.storage.open(field_file.name, 'rb')
+    path = finders.find(field_file.name)
+    return open(path, 'rb') if path else None
+
+
+def source_url(field_file):
+    """URL of an image field's file, served from static files when it is not in its storage."""
+    if field_file.storage.exists(field_file.name):
+        return field_file.url
+    return static(field_file.name)
+
+
+def variant_widths(source_width):
+    largest = min(source_width, max(settings.IMAGE_VARIANT_WIDTHS))
+    return sorted({w for w in settings.IMAGE_VARIANT_WIDTHS if w < largest} | {largest})
+
+
+def _encode(image, width, fmt):
+    height = max(1, round(image.height * width / image.width))
+    resized = image if width == image.width else image.resize((width, height), PILImage.LANCZOS)
+    if fmt == 'jpeg' and resized.mode == 'RGBA':
+        flattened = PILImage.new('RGB', resized.size, 'white')
+        flattened.paste(resized, mask=resized.getchannel('A'))
+        resized = flattened
+    buffer = io.BytesIO()
+    resized.save(buffer, **ENCODERS[fmt])
+    return width, height, fmt, buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """
+    Encode every width/format variant of ``field_file`` in the thread pool
+    and replace its ImageVariant rows. Returns the new variants, or an empty
+    list when the source is missing or cannot be decoded.
+    """
+    name = field_file.name
+    source = open_source(field_file)
+    if source is None:
+        logger.warning('Image %s not found, no variants generated', name)
+        return []
+
+    try:
+        with source:
+            image = ImageOps.exif_transpose(PILImage.open(source))
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    except (OSError, PILImage.DecompressionBombError):
+        logger.exception('Could not decode image %s', name)
+        return []
+
+    stem = str(PurePosixPath(name).with_suffix(''))
+    futures = [_pool().submit(_encode, image, width, fmt) for width in variant_widths(image.width) for fmt in ENCODERS]
+
+    variants = []
+    for future in futures:
+        width, height, fmt, data = future.result()
+        path = '%s-%dw.%s' % (stem, width, EXTENSIONS[fmt])
+        if variant_storage.exists(path):
+            variant_storage.delete(path)
+        variant_storage.save(path, ContentFile(data))
+        variants.append(ImageVariant(source=name, format=fmt, width=width, height=height, file=path, size=len(data)))
+
+    with transaction.atomic():
+        ImageVariant.objects.filter(source=name).delete()
+        ImageVariant.objects.bulk_create(variants)
+    return variants
+
+
+def delete_variants(name):
+    for path in ImageVariant.objects.filter(source=name).values_list('file', flat=True):
+        variant_storage.delete(path)
+    ImageVariant.objects.filter(source=name).delete()
+
+
+def srcsets_for(names):
+    """Map each source name to ``{'webp': srcset, 'jpeg': srcset}`` for the variants that exist."""
+    srcsets = defaultdict(lambda: defaultdict(list))
+    for source, fmt, width, path in ImageVariant.objects.filter(source__in=set(names)).values_list(
+        'source', 'format', 'width', 'file'
+    ):
+        srcsets[source][fmt].append('%s %dw' % (variant_storage.url(path), width))
+    return {source: {fmt: ', '.join(entries) for fmt, entries in by_format.items()} for source, by_format in srcsets.items()}
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.archive import ARCHIVED_MODELS, archive_before
+
+
+class Command(BaseCommand):
+    help = 'Move old PageView and Interaction rows into compressed monthly archive files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TELEMETRY_RETENTION_DAYS,
+                            help='Keep rows newer than this many days in the live tables.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--model', choices=sorted(ARCHIVED_MODELS), action='append', dest='models',
+                            help='Only archive this model (repeatable).')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        for name in options['models'] or sorted(ARCHIVED_MODELS):
+            archived = archive_before(ARCHIVED_MODELS[name], cutoff, batch_size=options['batch_size'])
+            self.stdout.write(f'{name}: archived {archived} row(s) older than {cutoff:%Y-%m-%d}')
@@ -0,0 +1,159 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# The pre-tuning setup: rollback journal, a new connection per request, deferred transactions.
+BASELINE = {
+    'pragmas': ['PRAGMA journal_mode=DELETE', 'PRAGMA synchronous=FULL'],
+    'begin': 'BEGIN',
+    'persistent': False,
+}
+
+
+def tuned_profile():
+    options = settings.DATABASES['default'].get('OPTIONS', {})
+    return {
+        'pragmas': [p.strip() for p in options.get('init_command', '').split(';') if p.strip()],
+        'begin': 'BEGIN %s' % options.get('transaction_mode', 'DEFERRED'),
+        'persistent': settings.DATABASES['default'].get('CONN_MAX_AGE', 0) != 0,
+    }
+
+
+def prepare(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        '''
+        CREATE TABLE attempt (id INTEGER PRIMARY KEY, quiz_id INTEGER, class_group TEXT, score REAL);
+        CREATE TABLE response (id INTEGER PRIMARY KEY, attempt_id INTEGER, question_id INTEGER, is_correct INTEGER);
+        CREATE TABLE pageview (id INTEGER PRIMARY KEY, article_id INTEGER, viewed_at REAL);
+        CREATE INDEX attempt_quiz ON attempt (quiz_id, class_group);
+        CREATE INDEX pageview_article ON pageview (article_id);
+        '''
+    )
+    conn.executemany(
+        'INSERT INTO attempt (quiz_id, class_group, score) VALUES (?, ?, ?)',
+        ((i % 50, '5%s' % 'ABC'[i % 3], i % 100) for i in range(rows))
+    )
+    conn.executemany(
+        'INSERT INTO pageview (article_id, viewed_at) VALUES (?, ?)',
+        ((i % 200, float(i)) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, profile, deadline, operation):
+        super().__init__(daemon=True)
+        self.path = path
+        self.profile = profile
+        self.deadline = deadline
+        self.operation = operation
+        self.done = 0
+        self.errors = 0
+        self.latencies = []
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        for pragma in self.profile['pragmas']:
+            conn.execute(pragma)
+        return conn
+
+    def run(self):
+        conn = self.connect() if self.profile['persistent'] else None
+        n = 0
+        while time.monotonic() < self.deadline:
+            n += 1
+            started = time.monotonic()
+            c = conn or self.connect()
+            try:
+                self.operation(c, self.profile['begin'], n)
+                self.done += 1
+                self.latencies.append(time.monotonic() - started)
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if c.in_transaction:
+                    c.execute('ROLLBACK')
+            finally:
+                if conn is None:
+                    c.close()
+        if conn is not None:
+            conn.close()
+
+
+def read_dashboard(conn, begin, n):
+    conn.execute(
+        'SELECT class_group, COUNT(*), AVG(score) FROM attempt WHERE quiz_id = ? GROUP BY class_group', (n % 50,)
+    ).fetchall()
+    conn.execute('SELECT COUNT(*) FROM pageview WHERE article_id = ?', (n % 200,)).fetchone()
+
+
+def submit_quiz(conn, begin, n):
+    # Mirrors submit_quiz: read inside the transaction, then write the attempt and its responses.
+    conn.execute(begin)
+    conn.execute('SELECT COUNT(*) FROM attempt WHERE quiz_id = ?', (n % 50,)).fetchone()
+    attempt_id = conn.execute(
+        'INSERT INTO attempt (quiz_id, class_group, score) VALUES (?, ?, ?)', (n % 50, '5A', n % 100)
+    ).lastrowid
+    conn.executemany(
+        'INSERT INTO response (attempt_id, question_id, is_correct) VALUES (?, ?, ?)',
+        ((attempt_id, q, q % 2) for q in range(10))
+    )
+    conn.execute('COMMIT')
+
+
+def track_events(conn, begin, n):
+    conn.execute(begin)
+    conn.executemany('INSERT INTO pageview (article_id, viewed_at) VALUES (?, ?)', ((n % 200, time.time()),) * 20)
+    conn.execute('COMMIT')
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Command(BaseCommand):
+    help = 'Compare read/write throughput of the baseline and the configured SQLite connection profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile.')
+        parser.add_argument('--rows', type=int, default=50000, help='Rows seeded into each table.')
+
+    def handle(self, *args, **options):
+        profiles = [('baseline', BASELINE), ('configured', tuned_profile())]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, profile in profiles:
+                path = str(Path(tmp) / ('%s.sqlite3' % name))
+                prepare(path, options['rows'])
+
+                deadline = time.monotonic() + options['duration']
+                workers = [Worker(path, profile, deadline, read_dashboard) for _ in range(options['readers'])]
+                workers += [
+                    Worker(path, profile, deadline, submit_quiz if i % 2 == 0 else track_events)
+                    for i in range(options['writers'])
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+
+                readers, writers = workers[:options['readers']], workers[options['readers']:]
+                for label, group in (('reads', readers), ('writes', writers)):
+                    latencies = [l for w in group for l in w.latencies]
+                    self.stdout.write(
+                        f'{name:>10} {label:<6} {sum(w.done for w in group) / options["duration"]:9.1f} ops/s  '
+                        f'p50 {percentile(latencies, 0.5) * 1000:7.2f} ms  '
+                        f'p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  '
+                        f'errors {sum(w.errors for w in group)}'
+                    )
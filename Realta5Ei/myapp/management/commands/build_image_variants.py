@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from myapp import caching, images
+from myapp.models import ImageVariant
+from myapp.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG variants for slide, glossary and timeline images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate images that already have variants.')
+        parser.add_argument('--prune', action='store_true', help='Delete variants of images no longer referenced.')
+
+    def handle(self, *args, **options):
+        done = set(ImageVariant.objects.values_list('source', flat=True).distinct())
+        referenced = set()
+        bumped = set()
+
+        for model, (field, namespace) in IMAGE_FIELDS.items():
+            for instance in model.objects.exclude(**{field: ''}).exclude(**{field + '__isnull': True}).only(field):
+                field_file = getattr(instance, field)
+                if field_file.name in referenced:
+                    continue
+                referenced.add(field_file.name)
+                if field_file.name in done and not options['force']:
+                    continue
+
+                variants = images.generate_variants(field_file)
+                self.stdout.write(f'{field_file.name}: {len(variants)} variant(s), {sum(v.size for v in variants)} bytes')
+                if variants:
+                    bumped.add(namespace)
+
+        if options['prune']:
+            for name in done - referenced:
+                images.delete_variants(name)
+                self.stdout.write(f'{name}: pruned')
+
+        if bumped:
+            caching.bump(*bumped)
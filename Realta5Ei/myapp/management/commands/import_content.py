@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.content_import import FixtureError, import_content
+
+
+class Command(BaseCommand):
+    help = (
+        'Upsert articles, presentations, slides, images, glossary terms, timeline events and quizzes '
+        'from a JSON fixture by natural key, in bulk and in one transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Path to a JSON fixture, e.g. myapp/fixtures/fixture.json.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['fixture'], encoding='utf-8') as stream:
+                importer = import_content(stream)
+        except OSError as e:
+            raise CommandError(str(e))
+        except FixtureError as e:
+            raise CommandError('%s: %s' % (options['fixture'], e))
+
+        for label, counts in importer.stats.items():
+            self.stdout.write(
+                f"{label}: {counts['created']} created, {counts['updated']} updated, {counts['unchanged']} unchanged"
+            )
+        for label, count in sorted(importer.skipped.items()):
+            self.stderr.write(f'{label}: {count} object(s) skipped, not content (use loaddata)')
+        self.stdout.write(self.style.SUCCESS(f'Imported in {time.monotonic() - started:.2f}s.'))
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp import pdf_pages
+from myapp.models import Article, Image, Presentation, Slide
+
+
+def pdf_path(article):
+    """Local path of an article's PDF, from its storage or from static files."""
+    name = article.pdf.name
+    if name and default_storage.exists(name):
+        return default_storage.path(name)
+    return finders.find(name) if name else None
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_prefix(article):
+    return 'slides/%d/' % article.article_id
+
+
+def page_image_name(article, digest, number):
+    # The PDF digest is part of the name, so a replaced PDF re-renders every page
+    # while an interrupted run resumes from the pages already stored.
+    return '%s%s-p%03d.png' % (page_prefix(article), digest[:12], number)
+
+
+class Command(BaseCommand):
+    help = 'Split article PDFs into slides: per-page title and text plus a rasterized page image.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('article_ids', nargs='*', type=int, help='Articles to ingest (default: all).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes.')
+        parser.add_argument('--dpi', type=int, default=settings.PDF_INGEST_DPI, help='Rasterization resolution.')
+        parser.add_argument('--force', action='store_true', help='Re-render pages that were already ingested.')
+        parser.add_argument(
+            '--overwrite-text', action='store_true',
+            help='Replace the title and text of existing slides with the extracted ones.'
+        )
+
+    def handle(self, *args, **options):
+        articles = Article.objects.order_by('article_id')
+        if options['article_ids']:
+            articles = articles.filter(article_id__in=options['article_ids'])
+            missing = set(options['article_ids']) - set(articles.values_list('article_id', flat=True))
+            if missing:
+                raise CommandError('Unknown article id(s): %s' % ', '.join(map(str, sorted(missing))))
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        for article in articles:
+            path = pdf_path(article)
+            if path is None:
+                self.stderr.write(f'article {article.article_id}: {article.pdf.name} not found, skipped')
+                continue
+            self.ingest(article, path, options)
+
+    def ingest(self, article, path, options):
+        started = time.monotonic()
+        digest = file_digest(path)
+        count = pdf_pages.page_count(path)
+        names = {number: page_image_name(article, digest, number) for number in range(1, count + 1)}
+
+        presentation = article.presentations.order_by('presentation_id').first()
+        if presentation is None:
+            presentation = Presentation.objects.create(article=article, title=article.article_title)
+
+        done = set()
+        if not options['force']:
+            for number, name in Image.objects.filter(
+                slide__presentation=presentation, image_file__in=names.values()
+            ).values_list('slide__slide_number', 'image_file'):
+                if names.get(number) == name and default_storage.exists(name):
+                    done.add(number)
+        pending = [number for number in names if number not in done]
+
+        if pending:
+            workers = min(options['workers'], len(pending))
+            scale = options['dpi'] / 72
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=pdf_pages.open_document, initargs=(path,)
+            ) as pool:
+                futures = [pool.submit(pdf_pages.render_page, number - 1, scale) for number in pending]
+                # Each page commits on its own, so an interrupted run keeps its progress.
+                for future in as_completed(futures):
+                    index, title, body, png = future.result()
+                    self.store_page(presentation, index + 1, names[index + 1], title, body, png, options)
+
+        stale = Image.objects.filter(
+            slide__presentation=presentation, image_file__startswith=page_prefix(article)
+        ).exclude(image_file__in=names.values())
+        for image in stale:
+            name = image.image_file.name
+            image.delete()
+            default_storage.delete(name)
+
+        extra = presentation.slides.filter(slide_number__gt=count).count()
+        if extra:
+            self.stderr.write(f'article {article.article_id}: {extra} slide(s) beyond page {count} left untouched')
+
+        images_number = Image.objects.filter(slide__presentation__article=article).count()
+        if (article.slides_number, article.images_number) != (count, images_number):
+            article.slides_number = count
+            article.images_number = images_number
+            article.save(update_fields=['slides_number', 'images_number'])
+
+        self.stdout.write(
+            f'article {article.article_id}: {len(pending)} of {count} page(s) ingested '
+            f'in {time.monotonic() - started:.1f}s'
+        )
+
+    def store_page(self, presentation, number, name, title, body, png, options):
+        with transaction.atomic():
+            slide = presentation.slides.filter(slide_number=number).order_by('id').first()
+            if slide is None:
+                slide = Slide(presentation=presentation, slide_number=number)
+            if slide.pk is None or options['overwrite_text']:
+                slide.slide_title = title or slide.slide_title
+                slide.slide_text = body
+                slide.save()
+
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(png))
+            image = Image.objects.filter(slide=slide, image_file=name).first() or Image(
+                slide=slide, image_number=number
+            )
+            image.image_file = name
+            image.save()
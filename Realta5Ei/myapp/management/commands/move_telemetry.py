@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from myapp.models import PageViewDailyRollup, ReactionCounter
+from myapp.rollups import rebuild_pageview_rollups
+from myapp.routers import TELEMETRY_DB, TELEMETRY_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Move telemetry rows still stored in the default database into the telemetry database.'
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        target = connections[TELEMETRY_DB]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError('move_telemetry copies between SQLite files only.')
+
+        qn = target.ops.quote_name
+        # Copied in SQL rather than through the ORM so auto_now timestamps keep their values.
+        with target.cursor() as cursor:
+            cursor.execute('ATTACH DATABASE %s AS source', [str(source.settings_dict['NAME'])])
+        moved_models = set()
+        try:
+            for name in sorted(TELEMETRY_MODELS):
+                model = apps.get_model('myapp', name)
+                table = model._meta.db_table
+                columns = ', '.join(qn(f.column) for f in model._meta.concrete_fields)
+
+                with transaction.atomic(using=TELEMETRY_DB), target.cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM source.sqlite_master WHERE type = 'table' AND name = %s", [table])
+                    if cursor.fetchone() is None:
+                        continue
+                    cursor.execute(f'SELECT COUNT(*) FROM main.{qn(table)}')
+                    if cursor.fetchone()[0]:
+                        self.stderr.write(f'{name}: telemetry table already has rows, skipped')
+                        continue
+                    cursor.execute(f'INSERT INTO main.{qn(table)} ({columns}) SELECT {columns} FROM source.{qn(table)}')
+                    moved = cursor.rowcount
+                    cursor.execute(f'DELETE FROM source.{qn(table)}')
+
+                self.stdout.write(f'{name}: moved {moved} row(s)')
+                moved_models.add(name)
+        finally:
+            with target.cursor() as cursor:
+                cursor.execute('DETACH DATABASE source')
+
+        if 'reaction' in moved_models:
+            counters = ReactionCounter.recompute()
+            self.stdout.write(f'reactioncounter: recomputed {len(counters)} counter(s)')
+        if 'pageview' in moved_models:
+            rebuild_pageview_rollups()
+            self.stdout.write(f'pageviewdailyrollup: rebuilt {PageViewDailyRollup.objects.count()} row(s)')
@@ -0,0 +1,44 @@
+import csv
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from myapp.archive import ARCHIVED_MODELS, iter_archived
+
+
+def parse_day(value):
+    try:
+        return timezone.make_aware(datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time.min))
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Read archived PageView or Interaction rows, as CSV or as a count.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(ARCHIVED_MODELS))
+        parser.add_argument('--since', type=parse_day, help='First day included (YYYY-MM-DD).')
+        parser.add_argument('--until', type=parse_day, help='First day excluded (YYYY-MM-DD).')
+        parser.add_argument('--article', type=int, dest='article_id')
+        parser.add_argument('--count', action='store_true', help='Only print the number of matching rows.')
+
+    def handle(self, *args, **options):
+        rows = iter_archived(
+            ARCHIVED_MODELS[options['model']],
+            since=options['since'],
+            until=options['until'],
+            article_id=options['article_id']
+        )
+
+        if options['count']:
+            self.stdout.write(str(sum(1 for _ in rows)))
+            return
+
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(self.stdout, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
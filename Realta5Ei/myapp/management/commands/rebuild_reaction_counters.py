@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+from myapp import caching
+from myapp.models import ReactionCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-article reaction counters from the Reaction rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('article_ids', nargs='*', type=int, help='Only repair these articles.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=router.db_for_write(ReactionCounter)):
+            counters = ReactionCounter.recompute(options['article_ids'] or None)
+
+        caching.bump(*(caching.reactions_namespace(c.article_id) for c in counters))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt reaction counters for {len(counters)} article(s).'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import AnnotationDailyRollup, PageViewDailyRollup, QuizDailyRollup, StudentDailyRollup
+from myapp.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily analytics rollups read by the teacher dashboard from the raw tables.'
+
+    def handle(self, *args, **options):
+        rebuild_rollups()
+
+        for model in (QuizDailyRollup, StudentDailyRollup, AnnotationDailyRollup, PageViewDailyRollup):
+            self.stdout.write(f'{model.__name__}: {model.objects.count()} row(s)')
+        self.stdout.write(self.style.SUCCESS('Rollups rebuilt.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from myapp.analytics import update_item_analysis
+from myapp.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Fold new quiz attempts into the stored psychometric item statistics.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help='Only update these quizzes.')
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids'] or Quiz.objects.values_list('id', flat=True)
+
+        for quiz_id in quiz_ids:
+            analysis = update_item_analysis(quiz_id)
+            self.stdout.write(
+                f'Quiz {quiz_id}: {analysis.attempts_count} attempt(s), alpha={analysis.cronbach_alpha}'
+            )
@@ -0,0 +1,106 @@
+import math
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import ratelimit
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs natively under ASGI. The stock middleware is
+    sync-only, so Django would hop every request, async views included, onto
+    a worker thread just to pass through it. It relies on WhiteNoise
+    internals (autorefresh, files, find_file, serve), hence the pinned
+    version in requirements.txt.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket limits per IP address (and student) for the write endpoints in
+    RATE_LIMITS, plus admission control: once WRITE_CONCURRENCY_LIMIT of them
+    are in flight, further writes are shed instead of queueing on the SQLite
+    writer. Rejected requests get a 429 with Retry-After.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        endpoint, rejected = self.admit(request)
+        if endpoint is None:
+            return rejected or self.get_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            ratelimit.release()
+
+    async def __acall__(self, request):
+        endpoint, rejected = self.admit(request)
+        if endpoint is None:
+            return rejected or await self.get_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            ratelimit.release()
+
+    def admit(self, request):
+        """Return ``(endpoint, None)`` for an admitted limited write, else ``(None, response or None)``."""
+        if request.method != 'POST':
+            return None, None
+        try:
+            endpoint = resolve(request.path_info).url_name
+        except Resolver404:
+            return None, None
+        if endpoint not in settings.RATE_LIMITS:
+            return None, None
+
+        wait = ratelimit.take(endpoint, ratelimit.buckets_for(endpoint, request))
+        if wait:
+            ratelimit.record(endpoint, 'limited')
+            return None, too_many_requests('Rate limit exceeded', wait)
+        if not ratelimit.admit():
+            ratelimit.record(endpoint, 'shed')
+            return None, too_many_requests('Server busy', 1)
+        ratelimit.record(endpoint, 'allowed')
+        return endpoint, None
+
+
+def too_many_requests(message, wait):
+    retry_after = max(1, math.ceil(wait))
+    response = JsonResponse({'error': message, 'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+def backfill_source_text(apps, schema_editor):
+    Presentation = apps.get_model('myapp', 'Presentation')
+    Slide = apps.get_model('myapp', 'Slide')
+    for presentation in Presentation.objects.all():
+        texts = Slide.objects.filter(presentation=presentation).order_by('id').values_list('slide_text', flat=True)
+        presentation.source_text = ''.join(t + '\n' for t in texts)
+        presentation.save(update_fields=['source_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_alter_article_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presentation',
+            name='source_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_source_text, migrations.RunPython.noop, hints={'model_name': 'presentation'}),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_reaction_counters(apps, schema_editor):
+    # Articles without reactions get their counter lazily on the first one;
+    # Article may live in another database than Reaction.
+    db_alias = schema_editor.connection.alias
+    Reaction = apps.get_model('myapp', 'Reaction')
+    ReactionCounter = apps.get_model('myapp', 'ReactionCounter')
+    counts = {}
+    for row in Reaction.objects.using(db_alias).values('article_id', 'type').annotate(total=Count('id')):
+        counts.setdefault(row['article_id'], {})[row['type']] = row['total']
+    ReactionCounter.objects.using(db_alias).bulk_create([
+        ReactionCounter(article_id=article_id, **{t: by_type.get(t, 0) for t in ('heart', 'star', 'thinking', 'clap')})
+        for article_id, by_type in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_presentation_source_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reaction_counter', serialize=False, to='myapp.article')),
+                ('heart', models.IntegerField(default=0)),
+                ('star', models.IntegerField(default=0)),
+                ('thinking', models.IntegerField(default=0)),
+                ('clap', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_reaction_counters, migrations.RunPython.noop, hints={'model_name': 'reactioncounter'}),
+    ]
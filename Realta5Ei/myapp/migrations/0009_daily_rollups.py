@@ -0,0 +1,127 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    QuizAttempt = apps.get_model('myapp', 'QuizAttempt')
+    Annotation = apps.get_model('myapp', 'Annotation')
+    QuizDailyRollup = apps.get_model('myapp', 'QuizDailyRollup')
+    StudentDailyRollup = apps.get_model('myapp', 'StudentDailyRollup')
+    AnnotationDailyRollup = apps.get_model('myapp', 'AnnotationDailyRollup')
+
+    attempts = QuizAttempt.objects.using(db_alias).annotate(day=TruncDate('completed_at')).order_by()
+    QuizDailyRollup.objects.using(db_alias).bulk_create(
+        QuizDailyRollup(**row)
+        for row in attempts.values('quiz_id', 'class_group', 'day').annotate(
+            attempts_count=Count('id'),
+            percentage_sum=Sum('percentage'),
+            max_percentage=Max('percentage'),
+            min_percentage=Min('percentage')
+        )
+    )
+    StudentDailyRollup.objects.using(db_alias).bulk_create(
+        StudentDailyRollup(**row)
+        for row in attempts.values('student_name', 'class_group', 'day').annotate(
+            attempts_count=Count('id'),
+            percentage_sum=Sum('percentage')
+        )
+    )
+
+    annotations = Annotation.objects.using(db_alias).annotate(
+        day=TruncDate('created_at'),
+        article_id=F('slide__presentation__article_id')
+    ).order_by()
+    AnnotationDailyRollup.objects.using(db_alias).bulk_create(
+        AnnotationDailyRollup(**row)
+        for row in annotations.values('article_id', 'class_group', 'day').annotate(
+            count=Count('id'),
+            public_count=Count('id', filter=Q(is_public=True))
+        )
+    )
+
+
+def backfill_pageview_rollups(apps, schema_editor):
+    # Page views may live in another database than the content rollups.
+    db_alias = schema_editor.connection.alias
+    PageView = apps.get_model('myapp', 'PageView')
+    PageViewDailyRollup = apps.get_model('myapp', 'PageViewDailyRollup')
+    pageviews = PageView.objects.using(db_alias).annotate(day=TruncDate('timestamp')).order_by()
+    PageViewDailyRollup.objects.using(db_alias).bulk_create(
+        PageViewDailyRollup(**row)
+        for row in pageviews.values('article_id', 'day').annotate(views=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_reactioncounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_name', models.CharField(max_length=100)),
+                ('class_group', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('attempts_count', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'unique_together': {('student_name', 'class_group', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AnnotationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_group', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('public_count', models.IntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='annotation_rollups', to='myapp.article')),
+            ],
+            options={
+                'unique_together': {('article', 'class_group', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PageViewDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pageview_rollups', to='myapp.article')),
+            ],
+            options={
+                'unique_together': {('article', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_group', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('attempts_count', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('max_percentage', models.FloatField(default=0)),
+                ('min_percentage', models.FloatField(default=0)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='myapp.quiz')),
+            ],
+            options={
+                'unique_together': {('quiz', 'class_group', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop, hints={'model_name': 'quizdailyrollup'}),
+        migrations.RunPython(
+            backfill_pageview_rollups, migrations.RunPython.noop, hints={'model_name': 'pageviewdailyrollup'}
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionItemStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='item_stats', serialize=False, to='myapp.question')),
+                ('correct_count', models.IntegerField(default=0)),
+                ('correct_total_sum', models.FloatField(default=0)),
+                ('answer_counts', models.JSONField(default=dict)),
+                ('difficulty', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizItemAnalysis',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='item_analysis', serialize=False, to='myapp.quiz')),
+                ('last_attempt_id', models.BigIntegerField(default=0)),
+                ('attempts_count', models.IntegerField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('total_squares_sum', models.FloatField(default=0)),
+                ('cronbach_alpha', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_item_analysis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discussionpost',
+            index=models.Index(fields=['topic', 'created_at', 'id'], name='myapp_discu_topic_i_0f190e_idx'),
+        ),
+    ]
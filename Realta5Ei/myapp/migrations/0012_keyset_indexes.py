@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_discussionpost_topic_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='annotation',
+            index=models.Index(fields=['slide', 'created_at', 'id'], name='myapp_annot_slide_i_bd87fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalevent',
+            index=models.Index(fields=['date', 'id'], name='myapp_histo_date_9f0664_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_duplicate_notes(apps, schema_editor):
+    CollaborativeNote = apps.get_model('myapp', 'CollaborativeNote')
+    seen = set()
+    for note in CollaborativeNote.objects.order_by('article_id', 'class_group', '-version', '-last_edited'):
+        key = (note.article_id, note.class_group)
+        if key in seen:
+            note.delete()
+        else:
+            seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollaborativeNotePatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField()),
+                ('position', models.IntegerField()),
+                ('removed', models.IntegerField()),
+                ('inserted', models.TextField(blank=True)),
+                ('contributor', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['version'],
+            },
+        ),
+        migrations.RunPython(drop_duplicate_notes, migrations.RunPython.noop, hints={'model_name': 'collaborativenote'}),
+        migrations.AddConstraint(
+            model_name='collaborativenote',
+            constraint=models.UniqueConstraint(fields=('article', 'class_group'), name='unique_collaborative_note'),
+        ),
+        migrations.AddField(
+            model_name='collaborativenotepatch',
+            name='note',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patches', to='myapp.collaborativenote'),
+        ),
+        migrations.AddConstraint(
+            model_name='collaborativenotepatch',
+            constraint=models.UniqueConstraint(fields=('note', 'version'), name='unique_collaborative_note_patch'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_collaborative_note_patches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interaction',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='interactions', to='myapp.article'),
+        ),
+        migrations.AlterField(
+            model_name='pageview',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='pageviews', to='myapp.article'),
+        ),
+        migrations.AlterField(
+            model_name='pageviewdailyrollup',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='pageview_rollups', to='myapp.article'),
+        ),
+        migrations.AlterField(
+            model_name='reaction',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='reactions', to='myapp.article'),
+        ),
+        migrations.AlterField(
+            model_name='reactioncounter',
+            name='article',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='reaction_counter', serialize=False, to='myapp.article'),
+        ),
+        migrations.AlterField(
+            model_name='studentprogress',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='myapp.article'),
+        ),
+    ]
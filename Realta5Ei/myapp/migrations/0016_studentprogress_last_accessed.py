@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-19 15:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_imagevariant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentprogress',
+            name='last_accessed',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
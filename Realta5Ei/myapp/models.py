@@ -39,6 +39,7 @@ class Presentation(models.Model):
         on_delete=models.CASCADE,
         related_name="presentations"
     )
+    source_text = models.TextField(blank=True, default='')
 
 class Slide(models.Model):
     presentation = models.ForeignKey(
@@ -88,6 +89,7 @@ class Annotation(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['slide', 'created_at', 'id'])]
 
 
 class AnnotationReply(models.Model):
@@ -190,10 +192,11 @@ class HistoricalEvent(models.Model):
 
     class Meta:
         ordering = ['date']
+        indexes = [models.Index(fields=['date', 'id'])]
 
 
 class PageView(models.Model):
-    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='pageviews')
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False, related_name='pageviews')
     ip_address = models.GenericIPAddressField()
     user_agent = models.CharField(max_length=500)
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -210,7 +213,7 @@ class Interaction(models.Model):
         ('download', 'Download PDF')
     ]
 
-    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='interactions')
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False, related_name='interactions')
     type = models.CharField(max_length=20, choices=INTERACTION_TYPES)
     element = models.CharField(max_length=200)
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -225,7 +228,7 @@ class Reaction(models.Model):
         ('clap', '👏')
     ]
 
-    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='reactions')
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False, related_name='reactions')
     type = models.CharField(max_length=20, choices=REACTION_TYPES)
     ip_address = models.GenericIPAddressField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -234,6 +237,41 @@ class Reaction(models.Model):
         unique_together = ['article', 'type', 'ip_address']
 
 
+class ReactionCounter(models.Model):
+    article = models.OneToOneField(
+        Article, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name='reaction_counter'
+    )
+    heart = models.IntegerField(default=0)
+    star = models.IntegerField(default=0)
+    thinking = models.IntegerField(default=0)
+    clap = models.IntegerField(default=0)
+
+    @classmethod
+    def recompute(cls, article_ids=None):
+        reactions = Reaction.objects.all()
+        if article_ids is None:
+            article_ids = Article.objects.values_list('article_id', flat=True)
+        else:
+            reactions = reactions.filter(article_id__in=article_ids)
+
+        counts = {article_id: {} for article_id in article_ids}
+        for row in reactions.values('article_id', 'type').annotate(total=Count('id')):
+            counts.setdefault(row['article_id'], {})[row['type']] = row['total']
+
+        types = [reaction_type for reaction_type, _ in Reaction.REACTION_TYPES]
+        counters = [
+            cls(article_id=article_id, **{t: by_type.get(t, 0) for t in types})
+            for article_id, by_type in counts.items()
+        ]
+        cls.objects.bulk_create(
+            counters,
+            update_conflicts=True,
+            unique_fields=['article'],
+            update_fields=types
+        )
+        return counters
+
+
 class DiscussionTopic(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='discussion_topics')
     title = models.CharField(max_length=200)
@@ -256,14 +294,17 @@ class DiscussionPost(models.Model):
     likes = models.IntegerField(default=0)
     is_highlighted = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['topic', 'created_at', 'id'])]
+
 
 class StudentProgress(models.Model):
     student_name = models.CharField(max_length=100)
     class_group = models.CharField(max_length=50)
-    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False)
     completion_percentage = models.FloatField(default=0)
     time_spent = models.IntegerField(default=0)
-    last_accessed = models.DateTimeField(auto_now=True)
+    last_accessed = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ['student_name', 'class_group', 'article']
@@ -293,4 +334,107 @@ class CollaborativeNote(models.Model):
     contributors = models.JSONField(default=list)
     last_edited = models.DateTimeField(auto_now=True)
     version = models.IntegerField(default=1)
-    is_locked = models.BooleanField(default=False)
\ No newline at end of file
+    is_locked = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'class_group'], name='unique_collaborative_note')
+        ]
+
+
+class CollaborativeNotePatch(models.Model):
+    note = models.ForeignKey(CollaborativeNote, on_delete=models.CASCADE, related_name='patches')
+    version = models.IntegerField()
+    position = models.IntegerField()
+    removed = models.IntegerField()
+    inserted = models.TextField(blank=True)
+    contributor = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['version']
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'version'], name='unique_collaborative_note_patch')
+        ]
+
+
+class QuizDailyRollup(models.Model):
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='daily_rollups')
+    class_group = models.CharField(max_length=50)
+    day = models.DateField()
+    attempts_count = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    max_percentage = models.FloatField(default=0)
+    min_percentage = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ['quiz', 'class_group', 'day']
+
+
+class StudentDailyRollup(models.Model):
+    student_name = models.CharField(max_length=100)
+    class_group = models.CharField(max_length=50)
+    day = models.DateField()
+    attempts_count = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ['student_name', 'class_group', 'day']
+
+
+class AnnotationDailyRollup(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='annotation_rollups')
+    class_group = models.CharField(max_length=50)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    public_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['article', 'class_group', 'day']
+
+
+class PageViewDailyRollup(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.DO_NOTHING, db_constraint=False, related_name='pageview_rollups')
+    day = models.DateField()
+    views = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['article', 'day']
+
+
+class QuizItemAnalysis(models.Model):
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='item_analysis')
+    last_attempt_id = models.BigIntegerField(default=0)
+    attempts_count = models.IntegerField(default=0)
+    total_sum = models.FloatField(default=0)
+    total_squares_sum = models.FloatField(default=0)
+    cronbach_alpha = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class QuestionItemStats(models.Model):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='item_stats')
+    correct_count = models.IntegerField(default=0)
+    correct_total_sum = models.FloatField(default=0)
+    answer_counts = models.JSONField(default=dict)
+    difficulty = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+
+
+class ImageVariant(models.Model):
+    FORMATS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG')
+    ]
+
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10, choices=FORMATS)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source', 'format', 'width']
+        unique_together = ['source', 'format', 'width']
@@ -0,0 +1,111 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import CollaborativeNote, CollaborativeNotePatch
+
+# Patches kept per note for rebasing stale clients; older clients get a snapshot.
+PATCH_HISTORY = 200
+
+PATCH_FIELDS = ('version', 'position', 'removed', 'inserted')
+
+
+class NoteConflict(Exception):
+    def __init__(self, note, base_version):
+        super().__init__('Note is at version %s, not %s' % (note.version if note else 0, base_version))
+        self.note = note
+        self.base_version = base_version
+
+
+def parse_patch(data):
+    position = int(data['position'])
+    removed = int(data['removed'])
+    inserted = data.get('inserted') or ''
+    if position < 0 or removed < 0 or not isinstance(inserted, str):
+        raise ValueError('Invalid patch')
+    return {'position': position, 'removed': removed, 'inserted': inserted}
+
+
+def apply_patch(content, patch):
+    position, removed = patch['position'], patch['removed']
+    if position + removed > len(content):
+        raise ValueError('Patch does not fit the note')
+    return content[:position] + patch['inserted'] + content[position + removed:]
+
+
+def patches_since(note, version):
+    """
+    Return the patches that bring ``version`` up to ``note.version``, or None
+    when part of that history has been pruned.
+    """
+    if note is None or version >= note.version:
+        return []
+    patches = list(note.patches.filter(version__gt=version).values(*PATCH_FIELDS))
+    if len(patches) != note.version - version:
+        return None
+    return patches
+
+
+async def apatches_since(note, version):
+    """Async version of patches_since."""
+    if note is None or version >= note.version:
+        return []
+    patches = [patch async for patch in note.patches.filter(version__gt=version).values(*PATCH_FIELDS)]
+    if len(patches) != note.version - version:
+        return None
+    return patches
+
+
+def _with_contributor(contributors, contributor):
+    contributors = list(contributors) if isinstance(contributors, list) else []
+    if contributor not in contributors:
+        contributors.append(contributor)
+    return contributors
+
+
+def commit_patch(article_id, class_group, base_version, patch, contributor):
+    """
+    Apply ``patch`` to the note if it is still at ``base_version``; otherwise
+    raise NoteConflict so the client can rebase onto the missing patches.
+    """
+    note = CollaborativeNote.objects.filter(article_id=article_id, class_group=class_group).first()
+
+    if note is None:
+        if base_version != 0:
+            raise NoteConflict(None, base_version)
+        content = apply_patch('', patch)
+        try:
+            with transaction.atomic():
+                note = CollaborativeNote.objects.create(
+                    article_id=article_id,
+                    class_group=class_group,
+                    content=content,
+                    contributors=[contributor]
+                )
+                CollaborativeNotePatch.objects.create(note=note, version=note.version, contributor=contributor, **patch)
+        except IntegrityError:
+            note = CollaborativeNote.objects.filter(article_id=article_id, class_group=class_group).first()
+            raise NoteConflict(note, base_version)
+        return note
+
+    if note.version != base_version:
+        raise NoteConflict(note, base_version)
+
+    note.content = apply_patch(note.content, patch)
+    note.contributors = _with_contributor(note.contributors, contributor)
+    note.version = base_version + 1
+    note.last_edited = timezone.now()
+
+    with transaction.atomic():
+        updated = CollaborativeNote.objects.filter(pk=note.pk, version=base_version).update(
+            content=note.content,
+            contributors=note.contributors,
+            version=note.version,
+            last_edited=note.last_edited
+        )
+        if not updated:
+            raise NoteConflict(CollaborativeNote.objects.filter(pk=note.pk).first(), base_version)
+        CollaborativeNotePatch.objects.create(note=note, version=note.version, contributor=contributor, **patch)
+        if note.version % PATCH_HISTORY == 0:
+            CollaborativeNotePatch.objects.filter(note=note, version__lte=note.version - PATCH_HISTORY).delete()
+
+    return note
@@ -0,0 +1,103 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'after'])
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, separators=(',', ':'), default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError, base64.binascii.Error) as exc:
+        raise ValueError(f'Invalid cursor: {token!r}') from exc
+    if not isinstance(data, dict):
+        raise ValueError(f'Invalid cursor: {token!r}')
+    return data
+
+
+def parse_datetime_key(value):
+    created_at, pk = value
+    created_at = datetime.fromisoformat(created_at)
+    # Cursors carry aware timestamps; a naive one could not be compared with them.
+    if timezone.is_naive(created_at):
+        raise ValueError(f'Cursor timestamp has no time zone: {created_at}')
+    return created_at, int(pk)
+
+
+def parse_limit(value, default, maximum):
+    if value in (None, ''):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError(f'Invalid limit: {value}')
+    return min(limit, maximum)
+
+
+def seek_filter(ordering, values):
+    """
+    Build the WHERE clause selecting rows strictly after ``values`` in
+    ``ordering`` (a list of field names, ``-`` for descending), expanded as
+    (a > x) OR (a = x AND b > y) OR ... so the database can seek on an index.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def _keyset_query(queryset, request, ordering, default_limit, max_limit):
+    limit = parse_limit(request.GET.get('limit'), default_limit, max_limit)
+    names = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    after = None
+    if request.GET.get('cursor'):
+        values = decode_cursor(request.GET['cursor']).get('after')
+        if not isinstance(values, list) or len(values) != len(names):
+            raise ValueError('Cursor does not match this listing')
+        try:
+            after = [queryset.model._meta.get_field(name).to_python(value) for name, value in zip(names, values)]
+        except Exception as exc:
+            raise ValueError('Cursor does not match this listing') from exc
+        queryset = queryset.filter(seek_filter(ordering, after))
+
+    return queryset[:limit + 1], limit, names, after
+
+
+def _keyset_page(items, limit, names, after):
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor({'after': [getattr(items[-1], name) for name in names]})
+    return KeysetPage(items, next_cursor, after)
+
+
+def keyset_paginate(queryset, request, ordering, default_limit=50, max_limit=200):
+    """
+    Return one KeysetPage of ``queryset`` ordered by ``ordering``, whose last
+    field must be unique. Reads ``limit`` and ``cursor`` from the query
+    string and raises ValueError when either is malformed.
+    """
+    queryset, limit, names, after = _keyset_query(queryset, request, ordering, default_limit, max_limit)
+    return _keyset_page(list(queryset), limit, names, after)
+
+
+async def akeyset_paginate(queryset, request, ordering, default_limit=50, max_limit=200):
+    """Async version of keyset_paginate for async views."""
+    queryset, limit, names, after = _keyset_query(queryset, request, ordering, default_limit, max_limit)
+    return _keyset_page([item async for item in queryset], limit, names, after)
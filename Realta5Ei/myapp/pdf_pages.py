@@ -0,0 +1,68 @@
+"""
+Page extraction for ``manage.py ingest_pdf``. Runs inside worker processes,
+so it only depends on pypdfium2 and Pillow, not on Django.
+"""
+import io
+
+import pypdfium2
+
+TITLE_MAX_LENGTH = 300
+
+_document = None
+
+
+def open_document(path):
+    """Worker initializer: open the PDF once per process."""
+    global _document
+    _document = pypdfium2.PdfDocument(path)
+
+
+def page_count(path):
+    document = pypdfium2.PdfDocument(path)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def split_title(text):
+    """
+    Split page text into ``(title, body)``. Leading all-caps lines are joined
+    into one title (cover slides break them across lines); otherwise the
+    first line is the title.
+    """
+    lines = [line.rstrip() for line in text.splitlines()]
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    if not lines:
+        return '', ''
+
+    taken = 1
+    if lines[0].isupper():
+        while taken < len(lines) and lines[taken].strip() and lines[taken].isupper():
+            taken += 1
+    title = ' '.join(line.strip() for line in lines[:taken])[:TITLE_MAX_LENGTH]
+    return title, '\n'.join(lines[taken:]).strip('\n')
+
+
+def render_page(index, scale):
+    """Return ``(index, title, body, png_bytes)`` for page ``index`` of the worker's document."""
+    page = _document[index]
+    buffer = io.BytesIO()
+    try:
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_bounded()
+        finally:
+            textpage.close()
+        bitmap = page.render(scale=scale)
+        try:
+            # to_pil() shares the bitmap's buffer, so encode before closing it.
+            bitmap.to_pil().save(buffer, format='PNG', optimize=True)
+        finally:
+            bitmap.close()
+    finally:
+        page.close()
+
+    title, body = split_title(text)
+    return index, title, body, buffer.getvalue()
@@ -0,0 +1,102 @@
+import asyncio
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+CHANNEL_RE = re.compile(r'^(article|slide):\d+$')
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def article_channel(article_id):
+    return 'article:%s' % article_id
+
+
+def slide_channel(slide_id):
+    return 'slide:%s' % slide_id
+
+
+class Subscription:
+    """
+    A websocket's view of the broker: a bounded queue on the event loop that
+    created it. Events carrying a ``class_group`` are only delivered to
+    subscribers of that class unless they are marked ``is_public``.
+    """
+
+    def __init__(self, class_group=''):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.class_group = class_group
+        self.channels = set()
+
+    def deliver(self, event):
+        audience = event.get('class_group')
+        if audience and not event.get('is_public') and audience != self.class_group:
+            return
+        if self.queue.full():
+            # Slow client: drop the oldest event, clients resync on gaps.
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """
+    Fan events out to the websockets served by this process. Only suitable
+    for a single ASGI worker; point PUSH_BROKER at a broker-backed class with
+    the same interface to run several.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, subscription, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+                subscription.channels.add(channel)
+
+    def unsubscribe(self, subscription, channels=None):
+        with self._lock:
+            for channel in list(subscription.channels if channels is None else channels):
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+                subscription.channels.discard(channel)
+
+    def publish(self, channel, event):
+        event = dict(event, channel=channel)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUSH_BROKER)()
+    return _broker
+
+
+def publish(channel, event, using=None):
+    """Publish ``event`` once the current transaction (if any) on ``using`` commits."""
+    transaction.on_commit(lambda: get_broker().publish(channel, event), using=using)
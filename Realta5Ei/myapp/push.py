@@ -0,0 +1,63 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from .pubsub import CHANNEL_RE, Subscription, get_broker
+
+PUSH_PATH = '/ws/push/'
+
+MAX_CHANNELS = 64
+
+
+def _channels(names):
+    return [name for name in names if isinstance(name, str) and CHANNEL_RE.match(name)]
+
+
+async def websocket_application(scope, receive, send):
+    """
+    Pure ASGI websocket endpoint. Clients connect to
+    ``/ws/push/?channel=article:1&channel=slide:3&class_group=5A`` and may
+    send ``{"subscribe": [...]}`` / ``{"unsubscribe": [...]}`` frames later.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'] != PUSH_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    broker = get_broker()
+    subscription = Subscription(params.get('class_group', [''])[0])
+    broker.subscribe(subscription, _channels(params.get('channel', []))[:MAX_CHANNELS])
+    await send({'type': 'websocket.accept'})
+
+    receiving = asyncio.ensure_future(receive())
+    waiting = asyncio.ensure_future(subscription.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receiving, waiting}, return_when=asyncio.FIRST_COMPLETED)
+
+            if waiting in done:
+                await send({'type': 'websocket.send', 'text': json.dumps(waiting.result())})
+                waiting = asyncio.ensure_future(subscription.get())
+
+            if receiving in done:
+                message = receiving.result()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                try:
+                    data = json.loads(message.get('text') or '{}')
+                except ValueError:
+                    data = None
+                if isinstance(data, dict):
+                    broker.unsubscribe(subscription, _channels(data.get('unsubscribe') or []))
+                    room = MAX_CHANNELS - len(subscription.channels)
+                    # Clients resend every channel after reconnecting; those already held take no room.
+                    channels = [c for c in _channels(data.get('subscribe') or []) if c not in subscription.channels]
+                    broker.subscribe(subscription, channels[:max(room, 0)])
+                receiving = asyncio.ensure_future(receive())
+    finally:
+        receiving.cancel()
+        waiting.cancel()
+        broker.unsubscribe(subscription)
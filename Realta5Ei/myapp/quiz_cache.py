@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import router, transaction
+from django.http import Http404
+
+from . import caching
+from .models import Question, Quiz
+
+COMPILED_QUIZ_TIMEOUT = 60 * 60
+
+_compiled_quizzes = {}
+
+
+def quiz_namespace(quiz_id):
+    return 'quiz:%s' % quiz_id
+
+
+def compile_quiz(quiz_id, version):
+    quiz = Quiz.objects.filter(id=quiz_id).values(
+        'id', 'title', 'description', 'difficulty', 'time_limit', 'passing_score'
+    ).first()
+    if quiz is None:
+        return None
+
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by('order', 'id', 'answers__id').values_list(
+        'id', 'question_type', 'text', 'points', 'explanation',
+        'answers__id', 'answers__text', 'answers__is_correct', 'answers__feedback'
+    )
+
+    questions = {}
+    question_order = []
+    for question_id, question_type, text, points, explanation, answer_id, answer_text, is_correct, feedback in rows:
+        question = questions.get(question_id)
+        if question is None:
+            question = questions[question_id] = {
+                'type': question_type,
+                'text': text,
+                'points': points,
+                'explanation': explanation,
+                'answers': {},
+                'correct_answer_ids': [],
+                'correct_answer': None
+            }
+            question_order.append(question_id)
+        if answer_id is None:
+            continue
+        question['answers'][answer_id] = {'text': answer_text, 'is_correct': is_correct, 'feedback': feedback}
+        if is_correct:
+            question['correct_answer_ids'].append(answer_id)
+            if question['correct_answer'] is None:
+                question['correct_answer'] = answer_text
+
+    payload = dict(quiz, questions=[
+        {
+            'id': question_id,
+            'type': questions[question_id]['type'],
+            'text': questions[question_id]['text'],
+            'points': questions[question_id]['points'],
+            'answers': [
+                {'id': answer_id, 'text': answer['text']}
+                for answer_id, answer in questions[question_id]['answers'].items()
+            ]
+        }
+        for question_id in question_order
+    ])
+
+    return {
+        'id': quiz['id'],
+        'version': version,
+        'passing_score': quiz['passing_score'],
+        'max_score': sum(q['points'] for q in questions.values()),
+        'question_order': question_order,
+        'questions': questions,
+        'payload': payload
+    }
+
+
+def get_compiled_quiz(quiz_id):
+    version, = caching.get_versions(quiz_namespace(quiz_id))
+
+    compiled = _compiled_quizzes.get(quiz_id)
+    if compiled is not None and compiled['version'] == version:
+        return compiled
+
+    key = 'compiled-quiz:%s:%r' % (quiz_id, version)
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_quiz(quiz_id, version)
+        if compiled is None:
+            _compiled_quizzes.pop(quiz_id, None)
+            raise Http404('No Quiz matches the given query.')
+        cache.set(key, compiled, COMPILED_QUIZ_TIMEOUT)
+
+    _compiled_quizzes[quiz_id] = compiled
+    return compiled
+
+
+def invalidate_quiz(quiz_id):
+    """
+    Drop the compiled quiz once the current transaction commits. Bumping
+    earlier would let a concurrent request recompile the still-committed old
+    answer key and cache it under the new version.
+    """
+    def invalidate():
+        caching.bump(quiz_namespace(quiz_id))
+        _compiled_quizzes.pop(quiz_id, None)
+
+    transaction.on_commit(invalidate, using=router.db_for_write(Quiz))
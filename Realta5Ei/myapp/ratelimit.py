@@ -0,0 +1,121 @@
+import json
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+OUTCOMES = ('allowed', 'limited', 'shed')
+
+# Bucket updates are read-modify-write on a per-process cache, so one lock
+# keeps concurrent requests from the same client from sharing a token.
+_lock = threading.Lock()
+_in_flight = 0
+
+
+def _cache():
+    return caches[settings.RATE_LIMIT_CACHE]
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, or the X-Forwarded-For entry added by
+    the outermost of RATE_LIMIT_TRUSTED_PROXIES proxies in front of Django.
+    Entries further left are client-supplied and never trusted.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        entries = [entry.strip() for entry in forwarded.split(',')]
+        return entries[-min(proxies, len(entries))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def student_id(request):
+    """Class group and name of the student named in a JSON body, or None."""
+    if request.content_type != 'application/json':
+        return None
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get('student_name'), str) and data['student_name']:
+        return '%s:%s' % (data.get('class_group', ''), data['student_name'])
+    return None
+
+
+def buckets_for(endpoint, request):
+    """
+    The (client, rate, burst) buckets a request to ``endpoint`` draws from:
+    always one per IP address, plus one per student when the body names one.
+    The student name is client-controlled, so it only ever tightens the limit.
+    """
+    limits = settings.RATE_LIMITS[endpoint]
+    buckets = [('ip:%s' % client_ip(request),) + tuple(limits['ip'])]
+    student = student_id(request) if 'student' in limits else None
+    if student is not None:
+        buckets.append(('student:%s' % student,) + tuple(limits['student']))
+    return buckets
+
+
+def take(endpoint, buckets):
+    """
+    Take a token from each (client, rate, burst) bucket of ``endpoint``. A
+    bucket holds up to ``burst`` tokens and refills at ``rate`` per second.
+    Tokens are only taken when every bucket has one. Returns 0 when the
+    request may proceed, otherwise the seconds until it could.
+    """
+    now = time.time()
+    cache = _cache()
+    with _lock:
+        state = []
+        for client, rate, burst in buckets:
+            key = 'ratelimit:bucket:%s:%s' % (endpoint, client)
+            tokens, stamp = cache.get(key) or (burst, now)
+            state.append((key, min(burst, tokens + (now - stamp) * rate), rate, burst))
+        wait = max((1 - tokens) / rate if tokens < 1 else 0 for _, tokens, rate, _ in state)
+        for key, tokens, rate, burst in state:
+            if not wait:
+                tokens -= 1
+            # The entry can expire once the bucket would be full again.
+            cache.set(key, (tokens, now), math.ceil((burst - tokens) / rate) + 1)
+    return wait
+
+
+def admit():
+    """Reserve one of WRITE_CONCURRENCY_LIMIT in-flight write slots; False when all are taken."""
+    global _in_flight
+    with _lock:
+        if _in_flight >= settings.WRITE_CONCURRENCY_LIMIT:
+            return False
+        _in_flight += 1
+        return True
+
+
+def release():
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def record(endpoint, outcome):
+    key = 'ratelimit:stats:%s:%s' % (endpoint, outcome)
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    keys = ['ratelimit:stats:%s:%s' % (name, outcome) for name in settings.RATE_LIMITS for outcome in OUTCOMES]
+    counts = _cache().get_many(keys)
+    endpoints = {}
+    for name in sorted(settings.RATE_LIMITS):
+        endpoint = {outcome: counts.get('ratelimit:stats:%s:%s' % (name, outcome), 0) for outcome in OUTCOMES}
+        total = sum(endpoint.values())
+        endpoint['rejected_rate'] = (endpoint['limited'] + endpoint['shed']) / total if total else None
+        endpoints[name] = endpoint
+    return {'endpoints': endpoints, 'in_flight': _in_flight, 'concurrency_limit': settings.WRITE_CONCURRENCY_LIMIT}
@@ -0,0 +1,136 @@
+from collections import Counter
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.utils import timezone
+
+from .archive import iter_archived
+from .models import (
+    Annotation, AnnotationDailyRollup, Article, PageView, PageViewDailyRollup, QuizAttempt, QuizDailyRollup, Slide,
+    StudentDailyRollup,
+)
+
+
+def increment(model, key, updates, initial):
+    """
+    Apply ``updates`` (F() expressions) to the rollup row identified by
+    ``key``, creating it from ``initial`` if it does not exist yet.
+    """
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic(using=router.db_for_write(model)):
+            model.objects.create(**key, **initial)
+    except IntegrityError:
+        model.objects.filter(**key).update(**updates)
+
+
+def record_quiz_attempt(attempt):
+    day = timezone.localdate(attempt.completed_at)
+    percentage = attempt.percentage
+
+    increment(
+        QuizDailyRollup,
+        {'quiz_id': attempt.quiz_id, 'class_group': attempt.class_group, 'day': day},
+        {
+            'attempts_count': F('attempts_count') + 1,
+            'percentage_sum': F('percentage_sum') + percentage,
+            'max_percentage': Greatest(F('max_percentage'), percentage),
+            'min_percentage': Least(F('min_percentage'), percentage)
+        },
+        {'attempts_count': 1, 'percentage_sum': percentage, 'max_percentage': percentage, 'min_percentage': percentage}
+    )
+    increment(
+        StudentDailyRollup,
+        {'student_name': attempt.student_name, 'class_group': attempt.class_group, 'day': day},
+        {'attempts_count': F('attempts_count') + 1, 'percentage_sum': F('percentage_sum') + percentage},
+        {'attempts_count': 1, 'percentage_sum': percentage}
+    )
+
+
+def record_annotation(annotation):
+    article_id = Slide.objects.filter(pk=annotation.slide_id).values_list('presentation__article_id', flat=True).first()
+    if article_id is None:
+        return
+    public = 1 if annotation.is_public else 0
+
+    increment(
+        AnnotationDailyRollup,
+        {'article_id': article_id, 'class_group': annotation.class_group, 'day': timezone.localdate(annotation.created_at)},
+        {'count': F('count') + 1, 'public_count': F('public_count') + public},
+        {'count': 1, 'public_count': public}
+    )
+
+
+def record_pageviews(pageviews):
+    views = Counter((pv.article_id, timezone.localdate(pv.timestamp)) for pv in pageviews)
+    for (article_id, day), count in views.items():
+        increment(
+            PageViewDailyRollup,
+            {'article_id': article_id, 'day': day},
+            {'views': F('views') + count},
+            {'views': count}
+        )
+
+
+def rebuild_rollups():
+    """
+    Recompute every rollup from the raw tables. Each database is rebuilt in
+    its own transaction, so readers never see an emptied table and
+    concurrent increments wait for the rebuild instead of being lost.
+    """
+    with transaction.atomic(using=router.db_for_write(QuizDailyRollup)):
+        QuizDailyRollup.objects.all().delete()
+        StudentDailyRollup.objects.all().delete()
+        AnnotationDailyRollup.objects.all().delete()
+
+        attempts = QuizAttempt.objects.annotate(day=TruncDate('completed_at')).order_by()
+        QuizDailyRollup.objects.bulk_create(
+            QuizDailyRollup(**row)
+            for row in attempts.values('quiz_id', 'class_group', 'day').annotate(
+                attempts_count=Count('id'),
+                percentage_sum=Sum('percentage'),
+                max_percentage=Max('percentage'),
+                min_percentage=Min('percentage')
+            )
+        )
+        StudentDailyRollup.objects.bulk_create(
+            StudentDailyRollup(**row)
+            for row in attempts.values('student_name', 'class_group', 'day').annotate(
+                attempts_count=Count('id'),
+                percentage_sum=Sum('percentage')
+            )
+        )
+
+        annotations = Annotation.objects.annotate(
+            day=TruncDate('created_at'),
+            article_id=F('slide__presentation__article_id')
+        ).order_by()
+        AnnotationDailyRollup.objects.bulk_create(
+            AnnotationDailyRollup(**row)
+            for row in annotations.values('article_id', 'class_group', 'day').annotate(
+                count=Count('id'),
+                public_count=Count('id', filter=Q(is_public=True))
+            )
+        )
+
+    rebuild_pageview_rollups()
+
+
+def rebuild_pageview_rollups():
+    """Recompute the page view rollup from the live and archived page views."""
+    with transaction.atomic(using=router.db_for_write(PageViewDailyRollup)):
+        PageViewDailyRollup.objects.all().delete()
+        views = Counter(
+            (row['article_id'], timezone.localdate(row['timestamp'])) for row in iter_archived(PageView)
+        )
+        pageviews = PageView.objects.annotate(day=TruncDate('timestamp')).order_by()
+        for row in pageviews.values('article_id', 'day').annotate(views=Count('id')):
+            views[row['article_id'], row['day']] += row['views']
+        articles = set(Article.objects.values_list('article_id', flat=True))
+        PageViewDailyRollup.objects.bulk_create(
+            PageViewDailyRollup(article_id=article_id, day=day, views=count)
+            for (article_id, day), count in views.items()
+            if article_id in articles
+        )
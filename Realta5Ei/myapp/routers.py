@@ -0,0 +1,49 @@
+from django.db import DEFAULT_DB_ALIAS
+
+TELEMETRY_DB = 'telemetry'
+
+# High-volume tables written on every page view, heartbeat and reaction. They
+# reference content by id only (db_constraint=False), so queries must not join
+# them to Article, Slide or Quiz.
+TELEMETRY_MODELS = {
+    'pageview',
+    'interaction',
+    'reaction',
+    'reactioncounter',
+    'studentprogress',
+    'pageviewdailyrollup',
+}
+
+
+def is_telemetry(app_label, model_name):
+    return app_label == 'myapp' and model_name in TELEMETRY_MODELS
+
+
+class TelemetryRouter:
+    """Keep the telemetry models in the TELEMETRY_DB alias and everything else in default."""
+
+    def _is_telemetry(self, model):
+        return is_telemetry(model._meta.app_label, model._meta.model_name)
+
+    def _db(self, model):
+        if self._is_telemetry(model):
+            return TELEMETRY_DB
+        # Named explicitly: left to Django, an article reached from a
+        # telemetry row would be looked up in the telemetry database.
+        return DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        return self._db(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if self._is_telemetry(type(obj1)) or self._is_telemetry(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == TELEMETRY_DB:
+            return is_telemetry(app_label, model_name)
+        return not is_telemetry(app_label, model_name)
@@ -0,0 +1,142 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, images
+from .models import (
+    Answer, Article, GlossaryTerm, HistoricalEvent, Image, ImageVariant, Interaction, PageView, PageViewDailyRollup,
+    Presentation, Question, Quiz, Reaction, ReactionCounter, Slide, StudentProgress,
+)
+from .quiz_cache import invalidate_quiz
+
+
+def bump_on_commit(using, *namespaces):
+    # Bumping before the write commits would let a concurrent request cache the old rows under the new version.
+    transaction.on_commit(lambda: caching.bump(*namespaces), using=using)
+
+
+def rebuild_source_text(presentation_id):
+    texts = Slide.objects.filter(presentation_id=presentation_id).order_by('id').values_list('slide_text', flat=True)
+    Presentation.objects.filter(pk=presentation_id).update(source_text=''.join(t + '\n' for t in texts))
+
+
+@receiver(pre_save, sender=Slide)
+def remember_slide_presentation(sender, instance, **kwargs):
+    instance._previous_presentation_id = None
+    if instance.pk:
+        instance._previous_presentation_id = (
+            Slide.objects.filter(pk=instance.pk).values_list('presentation_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Slide)
+@receiver(post_delete, sender=Slide)
+def refresh_presentation_source_text(sender, instance, using, **kwargs):
+    rebuild_source_text(instance.presentation_id)
+    previous = getattr(instance, '_previous_presentation_id', None)
+    if previous and previous != instance.presentation_id:
+        rebuild_source_text(previous)
+    bump_on_commit(using, caching.ARTICLES)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Presentation)
+@receiver(post_delete, sender=Presentation)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_articles(sender, using, **kwargs):
+    bump_on_commit(using, caching.ARTICLES)
+
+
+@receiver(post_delete, sender=Article)
+def delete_article_telemetry(sender, instance, **kwargs):
+    # Telemetry lives in its own database, out of reach of the delete cascade.
+    for model in (PageView, Interaction, Reaction, ReactionCounter, StudentProgress, PageViewDailyRollup):
+        model.objects.filter(article_id=instance.article_id).delete()
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quizzes(sender, instance, using, **kwargs):
+    bump_on_commit(using, caching.QUIZZES)
+    invalidate_quiz(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_quiz_questions(sender, instance, **kwargs):
+    invalidate_quiz(instance.quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_quiz_answers(sender, instance, **kwargs):
+    quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+    if quiz_id is not None:
+        invalidate_quiz(quiz_id)
+
+
+@receiver(post_save, sender=GlossaryTerm)
+@receiver(post_delete, sender=GlossaryTerm)
+def invalidate_glossary(sender, using, **kwargs):
+    bump_on_commit(using, caching.GLOSSARY)
+
+
+@receiver(post_save, sender=HistoricalEvent)
+@receiver(post_delete, sender=HistoricalEvent)
+def invalidate_timeline(sender, using, **kwargs):
+    bump_on_commit(using, caching.TIMELINE)
+
+
+@receiver(m2m_changed, sender=GlossaryTerm.related_articles.through)
+def invalidate_glossary_relations(sender, using, **kwargs):
+    bump_on_commit(using, caching.GLOSSARY)
+
+
+@receiver(m2m_changed, sender=HistoricalEvent.related_articles.through)
+def invalidate_timeline_relations(sender, using, **kwargs):
+    bump_on_commit(using, caching.TIMELINE)
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def invalidate_article_reactions(sender, instance, using, **kwargs):
+    bump_on_commit(using, caching.reactions_namespace(instance.article_id))
+
+
+# Image field and cache namespace of each model whose pictures get responsive variants.
+IMAGE_FIELDS = {
+    Image: ('image_file', caching.ARTICLES),
+    GlossaryTerm: ('image', caching.GLOSSARY),
+    HistoricalEvent: ('image', caching.TIMELINE),
+}
+
+
+def image_in_use(name):
+    return any(model.objects.filter(**{field: name}).exists() for model, (field, _) in IMAGE_FIELDS.items())
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=GlossaryTerm)
+@receiver(post_save, sender=HistoricalEvent)
+def refresh_image_variants(sender, instance, using, raw=False, **kwargs):
+    field, namespace = IMAGE_FIELDS[sender]
+    field_file = getattr(instance, field)
+    if raw or not field_file or ImageVariant.objects.filter(source=field_file.name).exists():
+        return
+
+    def generate():
+        if images.generate_variants(field_file):
+            caching.bump(namespace)
+
+    transaction.on_commit(generate, using=using)
+
+
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=GlossaryTerm)
+@receiver(post_delete, sender=HistoricalEvent)
+def remove_image_variants(sender, instance, **kwargs):
+    name = getattr(instance, IMAGE_FIELDS[sender][0]).name
+    if name and not image_in_use(name):
+        images.delete_variants(name)
@@ -18,6 +18,36 @@ class AnnotationSystem {
         });
 
         this.loadAnnotations();
+        this.listen();
+    }
+
+    listen() {
+        const push = typeof getPushChannel === 'function' ? getPushChannel() : null;
+        if (!push || !this.slide.dataset.slideId) return;
+
+        const channel = `slide:${this.slide.dataset.slideId}`;
+        push.subscribe(channel);
+
+        push.on('annotation', (event) => {
+            if (event.channel !== channel || this.findMarker(event.annotation.id)) return;
+            this.renderAnnotation(event.annotation);
+        });
+        push.on('annotation_likes', (event) => {
+            const marker = event.channel === channel && this.findMarker(event.annotation_id);
+            if (marker) marker.querySelector('.btn-like').textContent = `❤️ ${event.likes_count}`;
+        });
+        push.on('annotation_reply', (event) => {
+            const marker = event.channel === channel && this.findMarker(event.annotation_id);
+            if (marker) marker.querySelector('.btn-reply').textContent = `💬 ${event.replies_count}`;
+        });
+        push.on('resync', () => {
+            this.slide.querySelectorAll('.annotation-marker').forEach(marker => marker.remove());
+            this.loadAnnotations();
+        });
+    }
+
+    findMarker(annotationId) {
+        return this.slide.querySelector(`.annotation-marker[data-annotation-id="${annotationId}"]`);
     }
 
     showAnnotationDialog(text, x, y) {
@@ -128,7 +158,9 @@ class AnnotationSystem {
             });
 
             const annotation = await response.json();
-            this.renderAnnotation(annotation);
+            if (!this.findMarker(annotation.id)) {
+                this.renderAnnotation(annotation);
+            }
         } catch (error) {
             console.error('Error saving annotation:', error);
             alert('Errore nel salvataggio dell\'annotazione');
@@ -138,13 +170,18 @@ class AnnotationSystem {
     async loadAnnotations() {
         if (!this.slide.dataset.slideId) return;
 
+        const url = `/api/annotations/slide/${this.slide.dataset.slideId}/?class_group=${this.classGroup}`;
         try {
-            const response = await fetch(`/api/annotations/slide/${this.slide.dataset.slideId}/?class_group=${this.classGroup}`);
-            const data = await response.json();
+            let cursor = null;
+            do {
+                const response = await fetch(cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url);
+                const data = await response.json();
 
-            data.annotations.forEach(annotation => {
-                this.renderAnnotation(annotation);
-            });
+                data.annotations.forEach(annotation => {
+                    this.renderAnnotation(annotation);
+                });
+                cursor = data.next_cursor;
+            } while (cursor);
         } catch (error) {
             console.error('Error loading annotations:', error);
         }
@@ -4,14 +4,51 @@ class CollaborativeNotes {
         this.classGroup = localStorage.getItem('class_group') || '';
         this.studentName = localStorage.getItem('student_name') || '';
         this.content = '';
+        this.shadow = '';
         this.version = 0;
         this.saveTimeout = null;
+        this.saving = false;
+        this.latestVersion = 0;
+        this.textarea = null;
         this.init();
     }
     
     async init() {
         await this.loadNote();
         this.createNoteEditor();
+        this.listen();
+    }
+    
+    listen() {
+        const push = typeof getPushChannel === 'function' ? getPushChannel() : null;
+        if (!push || !this.classGroup) return;
+        
+        const channel = `article:${this.articleId}`;
+        push.subscribe(channel);
+        
+        push.on('note_patch', (event) => {
+            if (event.channel !== channel || event.class_group !== this.classGroup || event.version <= this.version) return;
+            this.latestVersion = Math.max(this.latestVersion, event.version);
+            if (this.saving) return;
+            if (event.version === this.version + 1) {
+                this.rebase({ version: event.version, patches: [event.patch] });
+            } else {
+                this.sync();
+            }
+        });
+        push.on('resync', () => this.sync());
+    }
+    
+    async sync() {
+        try {
+            const response = await fetch(`/api/notes/collaborative/get/?article_id=${this.articleId}&class_group=${this.classGroup}&since=${this.version}`);
+            const data = await response.json();
+            if (data.version > this.version && !this.saving) {
+                this.rebase(data);
+            }
+        } catch (error) {
+            console.error('Error syncing note:', error);
+        }
     }
     
     async loadNote() {
@@ -22,6 +59,7 @@ class CollaborativeNotes {
             const data = await response.json();
             
             this.content = data.content;
+            this.shadow = data.content;
             this.version = data.version;
         } catch (error) {
             console.error('Error loading note:', error);
@@ -74,6 +112,7 @@ class CollaborativeNotes {
         });
         
         const textarea = editor.querySelector('.notes-textarea');
+        this.textarea = textarea;
         textarea.addEventListener('input', (e) => {
             this.content = e.target.value;
             this.autoSave();
@@ -130,12 +169,86 @@ class CollaborativeNotes {
         }, 3000);
     }
     
+    // Offsets count code points so they match Python string indexing on the server.
+    static diff(before, after) {
+        const a = Array.from(before);
+        const b = Array.from(after);
+        let prefix = 0;
+        while (prefix < a.length && prefix < b.length && a[prefix] === b[prefix]) prefix++;
+        let suffix = 0;
+        while (suffix < a.length - prefix && suffix < b.length - prefix &&
+               a[a.length - 1 - suffix] === b[b.length - 1 - suffix]) suffix++;
+        return {
+            position: prefix,
+            removed: a.length - prefix - suffix,
+            inserted: b.slice(prefix, b.length - suffix).join('')
+        };
+    }
+    
+    static apply(content, patch) {
+        const chars = Array.from(content);
+        const position = Math.min(patch.position, chars.length);
+        chars.splice(position, patch.removed, ...Array.from(patch.inserted));
+        return chars.join('');
+    }
+    
+    // Shift a local patch so it applies after a concurrent remote one.
+    static transform(local, remote) {
+        const remoteEnd = remote.position + remote.removed;
+        const shift = Array.from(remote.inserted).length - remote.removed;
+        if (remoteEnd <= local.position) {
+            return {...local, position: local.position + shift};
+        }
+        if (remote.position >= local.position + local.removed) {
+            return local;
+        }
+        if (local.position < remote.position) {
+            return {...local, removed: remote.position - local.position};
+        }
+        return {
+            ...local,
+            position: remote.position + Array.from(remote.inserted).length,
+            removed: Math.max(0, local.position + local.removed - remoteEnd)
+        };
+    }
+    
+    rebase(data) {
+        let local = CollaborativeNotes.diff(this.shadow, this.content);
+        if (data.patches) {
+            data.patches.forEach(remote => {
+                this.shadow = CollaborativeNotes.apply(this.shadow, remote);
+                local = CollaborativeNotes.transform(local, remote);
+            });
+        } else {
+            this.shadow = data.content;
+        }
+        this.version = data.version;
+        this.content = CollaborativeNotes.apply(this.shadow, local);
+        
+        const versionElement = document.querySelector('.notes-version');
+        if (versionElement) {
+            versionElement.textContent = `Versione ${this.version}`;
+        }
+        
+        if (this.textarea && this.textarea.value !== this.content) {
+            const caret = this.textarea.selectionStart;
+            this.textarea.value = this.content;
+            this.textarea.selectionStart = this.textarea.selectionEnd = caret;
+        }
+    }
+    
     async saveNote() {
         if (!this.studentName || !this.classGroup) {
             alert('Per salvare le note, inserisci il tuo nome e classe');
             return;
         }
+        if (this.saving) return;
         
+        const sent = this.content;
+        const patch = CollaborativeNotes.diff(this.shadow, sent);
+        if (patch.removed === 0 && patch.inserted === '') return;
+        
+        this.saving = true;
         try {
             const response = await fetch('/api/notes/collaborative/update/', {
                 method: 'POST',
@@ -143,18 +256,26 @@ class CollaborativeNotes {
                 body: JSON.stringify({
                     article_id: this.articleId,
                     class_group: this.classGroup,
-                    content: this.content,
+                    base_version: this.version,
+                    patch: patch,
                     contributor: this.studentName
                 })
             });
             
             const data = await response.json();
-            this.version = data.version;
+            if (response.status === 409) {
+                this.rebase(data);
+            } else if (!response.ok) {
+                throw new Error(data.error || response.statusText);
+            } else {
+                this.shadow = sent;
+                this.version = data.version;
+            }
             
             const statusElement = document.querySelector('.save-status');
             const versionElement = document.querySelector('.notes-version');
             
-            if (statusElement) {
+            if (statusElement && this.content === this.shadow) {
                 statusElement.textContent = 'Salvato automaticamente';
                 statusElement.classList.remove('unsaved');
             }
@@ -170,6 +291,16 @@ class CollaborativeNotes {
                 statusElement.textContent = 'Errore nel salvataggio';
                 statusElement.classList.add('error');
             }
+            return;
+        } finally {
+            this.saving = false;
+        }
+        
+        if (this.latestVersion > this.version) {
+            await this.sync();
+        }
+        if (this.content !== this.shadow) {
+            this.saveNote();
         }
     }
 }
@@ -100,7 +100,7 @@ class GlossaryHighlighter {
             <div class="modal-content">
                 <button class="modal-close">×</button>
                 <h2>${term.term}</h2>
-                ${term.image ? `<img src="${term.image}" alt="${term.term}">` : ''}
+                ${term.image ? renderResponsiveImage(term.image, term.image_srcset, term.term, '(max-width: 600px) 90vw, 480px') : ''}
                 <div class="term-definition">
                     <h3>Definizione</h3>
                     <p>${term.definition}</p>
@@ -14,7 +14,7 @@ class ProgressTracker {
     
     getArticleId() {
         const path = window.location.pathname;
-        const match = path.match(/\/article\/([^\/]+)\//);
+        const match = path.match(/\/article\/(\d+)/);
         return match ? match[1] : null;
     }
     
@@ -78,8 +78,10 @@ class ProgressTracker {
                 })
             });
             
-            const data = await response.json();
-            this.startTime = Date.now();
+            // Keep the time spent for the next save when this one is rejected (e.g. 429).
+            if (response.ok) {
+                this.startTime = Date.now();
+            }
         } catch (error) {
             console.error('Error saving progress:', error);
         }
@@ -88,11 +90,17 @@ class ProgressTracker {
     async loadProgress() {
         if (!this.studentName || !this.classGroup) return;
         
+        const url = `/api/progress/get/?student_name=${this.studentName}&class_group=${this.classGroup}`;
         try {
-            const response = await fetch(`/api/progress/get/?student_name=${this.studentName}&class_group=${this.classGroup}`);
-            const data = await response.json();
-            
-            const currentProgress = data.progress.find(p => p.article_id === this.articleId);
+            let cursor = null;
+            let currentProgress;
+            do {
+                const response = await fetch(cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url);
+                const data = await response.json();
+
+                currentProgress = data.progress.find(p => p.article_id === this.articleId);
+                cursor = data.next_cursor;
+            } while (!currentProgress && cursor);
             if (currentProgress) {
                 console.log(`Progress loaded: ${currentProgress.completion}%`);
             }
@@ -0,0 +1,73 @@
+class PushChannel {
+    constructor(classGroup) {
+        this.classGroup = classGroup;
+        this.channels = new Set();
+        this.handlers = {};
+        this.socket = null;
+        this.retryDelay = 1000;
+        this.connected = false;
+        this.hasConnected = false;
+        this.connectTimeout = null;
+    }
+
+    on(type, handler) {
+        (this.handlers[type] = this.handlers[type] || []).push(handler);
+    }
+
+    emit(event) {
+        (this.handlers[event.type] || []).forEach(handler => handler(event));
+    }
+
+    subscribe(channel) {
+        if (this.channels.has(channel)) return;
+        this.channels.add(channel);
+
+        if (this.connected) {
+            this.socket.send(JSON.stringify({ subscribe: [channel] }));
+        } else if (!this.socket) {
+            // Batch the subscriptions made while the page initialises into one connect.
+            clearTimeout(this.connectTimeout);
+            this.connectTimeout = setTimeout(() => this.connect(), 0);
+        }
+    }
+
+    connect() {
+        const params = new URLSearchParams({ class_group: this.classGroup });
+        this.channels.forEach(channel => params.append('channel', channel));
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+
+        this.socket = new WebSocket(`${scheme}://${window.location.host}/ws/push/?${params}`);
+
+        this.socket.addEventListener('open', () => {
+            this.connected = true;
+            this.retryDelay = 1000;
+            // The URL only lists the channels known at connect time; add any subscribed while connecting.
+            this.socket.send(JSON.stringify({ subscribe: [...this.channels] }));
+            // Events published while we were away are lost: let widgets reload.
+            if (this.hasConnected) this.emit({ type: 'resync' });
+            this.hasConnected = true;
+        });
+
+        this.socket.addEventListener('message', (e) => {
+            try {
+                this.emit(JSON.parse(e.data));
+            } catch (error) {
+                console.error('Error handling push event:', error);
+            }
+        });
+
+        this.socket.addEventListener('close', () => {
+            this.connected = false;
+            setTimeout(() => this.connect(), this.retryDelay);
+            this.retryDelay = Math.min(this.retryDelay * 2, 30000);
+        });
+    }
+}
+
+let pushChannel = null;
+function getPushChannel() {
+    if (!pushChannel && 'WebSocket' in window) {
+        pushChannel = new PushChannel(localStorage.getItem('class_group') || '');
+    }
+    return pushChannel;
+}
@@ -14,6 +14,30 @@ class ReactionsSystem {
         await this.loadReactions();
         this.createReactionsPanel();
         this.trackInteractions();
+        this.listen();
+    }
+    
+    listen() {
+        const push = typeof getPushChannel === 'function' ? getPushChannel() : null;
+        if (!push) return;
+        
+        const channel = `article:${this.articleId}`;
+        push.subscribe(channel);
+        
+        push.on('reaction', (event) => {
+            if (event.channel !== channel) return;
+            this.setCount(event.reaction_type, event.count);
+        });
+        push.on('resync', async () => {
+            await this.loadReactions();
+            Object.keys(this.reactions).forEach(type => this.setCount(type, this.reactions[type]));
+        });
+    }
+    
+    setCount(type, count) {
+        this.reactions[type] = count;
+        const countElement = document.querySelector(`.reaction-btn[data-type="${type}"] .reaction-count`);
+        if (countElement) countElement.textContent = count;
     }
     
     async loadReactions() {
@@ -115,23 +139,16 @@ class ReactionsSystem {
         });
     }
     
-    async trackInteraction(type, element) {
-        const studentName = localStorage.getItem('student_name') || '';
-        
-        try {
-            await fetch('/api/interactions/track/', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({
-                    article_id: this.articleId,
-                    type: type,
-                    element: element,
-                    student_name: studentName
-                })
-            });
-        } catch (error) {
-            console.error('Error tracking interaction:', error);
-        }
+    trackInteraction(type, element) {
+        // telemetry.js is optional on a page; without it interactions are not tracked.
+        if (typeof telemetry === 'undefined') return;
+        telemetry.push({
+            kind: 'interaction',
+            article_id: this.articleId,
+            type: type,
+            element: element,
+            student_name: localStorage.getItem('student_name') || ''
+        });
     }
 }
 
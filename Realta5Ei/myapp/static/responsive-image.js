@@ -0,0 +1,11 @@
+// Markup for an image whose srcset comes from the API ({webp, jpeg}, see
+// myapp/images.py). Load before glossary-system.js and timeline-system.js.
+function renderResponsiveImage(src, srcset, alt, sizes) {
+    if (!srcset) return `<img src="${src}" alt="${alt}">`;
+    return `
+        <picture>
+            ${srcset.webp ? `<source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}">` : ''}
+            <img src="${src}" ${srcset.jpeg ? `srcset="${srcset.jpeg}" sizes="${sizes}"` : ''} alt="${alt}">
+        </picture>
+    `;
+}
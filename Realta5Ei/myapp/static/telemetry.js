@@ -0,0 +1,93 @@
+class TelemetryQueue {
+    constructor(endpoint = '/api/telemetry/batch/', maxBatch = 20, flushDelay = 10000) {
+        this.endpoint = endpoint;
+        this.maxBatch = maxBatch;
+        this.flushDelay = flushDelay;
+        this.events = [];
+        this.flushTimeout = null;
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.flush();
+            }
+        });
+        window.addEventListener('pagehide', () => this.flush());
+    }
+
+    push(event) {
+        this.events.push(event);
+
+        if (this.events.length >= this.maxBatch) {
+            this.flush();
+        } else if (!this.flushTimeout) {
+            this.flushTimeout = setTimeout(() => this.flush(), this.flushDelay);
+        }
+    }
+
+    flush() {
+        clearTimeout(this.flushTimeout);
+        this.flushTimeout = null;
+
+        if (this.events.length === 0) return;
+
+        const body = JSON.stringify({ events: this.events.splice(0) });
+
+        if (navigator.sendBeacon && navigator.sendBeacon(this.endpoint, new Blob([body], { type: 'application/json' }))) {
+            return;
+        }
+
+        fetch(this.endpoint, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: body,
+            keepalive: true
+        }).catch(error => {
+            console.error('Error sending telemetry:', error);
+        });
+    }
+}
+
+class PageViewTracker {
+    constructor(articleId, queue) {
+        this.articleId = articleId;
+        this.queue = queue;
+        this.startTime = Date.now();
+        this.maxScrollDepth = 0;
+        this.reported = false;
+
+        window.addEventListener('scroll', () => {
+            const scrollable = document.documentElement.scrollHeight - window.innerHeight;
+            const depth = scrollable > 0 ? (window.scrollY / scrollable) * 100 : 100;
+            this.maxScrollDepth = Math.max(this.maxScrollDepth, Math.min(100, depth));
+        }, { passive: true });
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.report();
+            }
+        });
+        window.addEventListener('pagehide', () => this.report());
+    }
+
+    report() {
+        if (this.reported) return;
+        this.reported = true;
+
+        this.queue.push({
+            kind: 'pageview',
+            article_id: this.articleId,
+            duration: Math.floor((Date.now() - this.startTime) / 1000),
+            scroll_depth: Math.round(this.maxScrollDepth),
+            referrer: document.referrer
+        });
+        this.queue.flush();
+    }
+}
+
+const telemetry = new TelemetryQueue();
+document.addEventListener('DOMContentLoaded', () => {
+    const page = document.querySelector('body[data-article-id]');
+    if (page) {
+        new PageViewTracker(page.dataset.articleId, telemetry);
+    }
+});
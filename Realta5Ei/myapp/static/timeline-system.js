@@ -99,7 +99,7 @@ class HistoricalTimeline {
             <div class="event-card">
                 ${event.image ? `
                     <div class="event-image">
-                        <img src="${event.image}" alt="${event.title}">
+                        ${renderResponsiveImage(event.image, event.image_srcset, event.title, '(max-width: 768px) 100vw, 40vw')}
                     </div>
                 ` : ''}
                 
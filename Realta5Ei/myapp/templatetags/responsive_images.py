@@ -0,0 +1,27 @@
+from django import template
+
+from myapp.images import source_url, srcsets_for
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 768px) 100vw, 50vw'
+
+
+@register.inclusion_tag('responsive_image.html', takes_context=True)
+def responsive_image(context, image, src=None, alt='', sizes=DEFAULT_SIZES, loading='lazy'):
+    """
+    Render ``image`` as a <picture> with WebP and JPEG srcsets, falling back
+    to ``src`` (the image's own URL by default). Views can pass
+    ``image_variants`` (from srcsets_for) in the context to avoid a query per
+    image.
+    """
+    variants = context.get('image_variants')
+    if variants is None:
+        variants = srcsets_for([image.name])
+    return {
+        'src': src or source_url(image),
+        'alt': alt,
+        'sizes': sizes,
+        'loading': loading,
+        'srcsets': variants.get(image.name, {})
+    }
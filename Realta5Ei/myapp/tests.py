@@ -1,3 +1,1316 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import iscoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.db import OperationalError, connections, router
+from django.db.models import Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from . import (
+    analytics, archive, caching, images, notes, pdf_pages, pubsub, push, quiz_cache, ratelimit, rollups, views
+)
+from .buffers import CounterBuffer, ProgressBuffer, WriteBuffer
+from .content_import import FixtureError, import_content
+from .middleware import RateLimitMiddleware, WhiteNoiseMiddleware
+from .models import (
+    AnnotationDailyRollup, Answer, Article, CollaborativeNote, DiscussionPost, DiscussionTopic, GlossaryTerm,
+    HistoricalEvent, Image, ImageVariant, Interaction, PageView, PageViewDailyRollup, Presentation, Question,
+    QuestionItemStats, QuestionResponse, Quiz, QuizAttempt, QuizDailyRollup, Reaction, ReactionCounter, Slide,
+    StudentDailyRollup, StudentProgress
+)
+from .pagination import encode_cursor, keyset_paginate
+from .routers import TELEMETRY_DB, TelemetryRouter
+
+
+def clear_caches():
+    # Primary keys are reused once a test's transaction rolls back, so cached
+    # entries keyed by id must not leak from one test into the next.
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    quiz_cache._compiled_quizzes.clear()
+
+
+def make_article(title='Articolo'):
+    return Article.objects.create(article_title=title, smart_description='', slides_number=0, images_number=0)
+
+
+def make_quiz(questions, article=None):
+    quiz = Quiz.objects.create(
+        article=article or make_article(), title='Quiz', description='', difficulty='facile', passing_score=60
+    )
+    items = []
+    for i in range(questions):
+        question = Question.objects.create(
+            quiz=quiz, question_type='multiple_choice', text='q%d' % i, explanation='e%d' % i, points=i + 1, order=i
+        )
+        right = Answer.objects.create(question=question, text='giusta', is_correct=True, feedback='bene')
+        wrong = Answer.objects.create(question=question, text='sbagliata', feedback='no')
+        items.append((question, right, wrong))
+    return quiz, items
+
+
+def post_json(client, path, data, **extra):
+    return client.post(path, json.dumps(data), content_type='application/json', **extra)
+
+
+class SubmitQuizTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.quiz, self.items = make_quiz(3)
+
+    def submit(self, responses, student='anna'):
+        return post_json(self.client, '/api/quiz/%d/submit/' % self.quiz.pk, {
+            'student_name': student, 'class_group': '3A', 'time_taken': 90, 'responses': responses
+        })
+
+    def test_grades_every_response_in_one_attempt(self):
+        (q0, right0, _), (q1, _, wrong1), (q2, right2, _) = self.items
+        response = self.submit([
+            {'question_id': q0.pk, 'answer_id': right0.pk},
+            {'question_id': q1.pk, 'answer_id': wrong1.pk},
+            {'question_id': q2.pk, 'answer_id': right2.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['score'], data['max_score']), (4, 6))
+        self.assertAlmostEqual(data['percentage'], 400 / 6)
+        self.assertTrue(data['passed'])
+        self.assertEqual([r['is_correct'] for r in data['results']], [True, False, True])
+        self.assertEqual(data['results'][1]['correct_answer'], 'giusta')
+        self.assertEqual(data['results'][1]['explanation'], 'e1')
+
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual(attempt.pk, data['attempt_id'])
+        self.assertEqual(
+            sorted(attempt.responses.values_list('question_id', 'is_correct', 'points_earned')),
+            [(q0.pk, True, 1), (q1.pk, False, 0), (q2.pk, True, 3)]
+        )
+
+    def test_invalid_answer_writes_nothing(self):
+        (q0, right0, _), (q1, _, _), _ = self.items
+        response = self.submit([
+            {'question_id': q0.pk, 'answer_id': right0.pk},
+            {'question_id': q1.pk, 'answer_id': right0.pk},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizAttempt.objects.exists())
+        self.assertFalse(QuestionResponse.objects.exists())
+
+    def test_repeated_question_is_rejected(self):
+        q0, right0, _ = self.items[0]
+        response = self.submit([
+            {'question_id': q0.pk, 'answer_id': right0.pk},
+            {'question_id': q0.pk, 'answer_id': right0.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_form_submission_is_graded(self):
+        (q0, right0, _), (q1, _, wrong1), _ = self.items
+        response = self.client.post('/quiz/%d/' % self.quiz.pk, {
+            'q_%d' % q0.pk: right0.pk, 'q_%d' % q1.pk: wrong1.pk
+        })
+        self.assertEqual((response.context['score'], response.context['total']), (1, 3))
+        self.assertEqual([r['is_correct'] for r in response.context['results']], [True, False, False])
+
+
+class CompiledQuizCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.quiz, self.items = make_quiz(2)
+
+    def grade(self, answer):
+        response = post_json(self.client, '/api/quiz/%d/submit/' % self.quiz.pk, {
+            'student_name': 'anna', 'class_group': '3A', 'time_taken': 30,
+            'responses': [{'question_id': answer.question_id, 'answer_id': answer.pk}]
+        })
+        return response.json()['results'][0]['is_correct']
+
+    def test_compiled_quiz_is_reused(self):
+        compiled = quiz_cache.get_compiled_quiz(self.quiz.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(quiz_cache.get_compiled_quiz(self.quiz.pk), compiled)
+
+    def test_editing_an_answer_changes_grading(self):
+        _, right, wrong = self.items[0]
+        self.assertTrue(self.grade(right))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.filter(pk=right.pk).update(is_correct=False)
+            wrong.is_correct = True
+            wrong.save()
+
+        self.assertFalse(self.grade(right))
+        self.assertTrue(self.grade(wrong))
+
+    def test_invalidation_waits_for_commit(self):
+        compiled = quiz_cache.get_compiled_quiz(self.quiz.pk)
+        _, right, _ = self.items[0]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            right.text = 'corretta'
+            right.save()
+        self.assertIs(quiz_cache.get_compiled_quiz(self.quiz.pk), compiled)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            quiz_cache.get_compiled_quiz(self.quiz.pk)['questions'][right.question_id]['correct_answer'], 'corretta'
+        )
+
+
+class ReactionCounterTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        self.article = make_article()
+
+    def react(self, reaction_type, ip='10.0.0.1'):
+        return post_json(
+            self.client, '/api/articles/%d/reactions/' % self.article.pk, {'type': reaction_type}, REMOTE_ADDR=ip
+        )
+
+    def counts(self):
+        return self.client.get('/api/articles/%d/reactions/get/' % self.article.pk).json()['reactions']
+
+    def test_reactions_toggle_the_counter(self):
+        self.assertEqual(self.react('heart').json(), {'action': 'added', 'count': 1})
+        self.assertEqual(self.react('heart', ip='10.0.0.2').json(), {'action': 'added', 'count': 2})
+        self.assertEqual(self.react('star').json(), {'action': 'added', 'count': 1})
+        self.assertEqual(self.react('heart').json(), {'action': 'removed', 'count': 1})
+
+        self.assertEqual(self.counts(), {'heart': 1, 'star': 1, 'thinking': 0, 'clap': 0})
+        self.assertEqual(Reaction.objects.count(), 2)
+
+    def test_article_without_reactions_reads_zero(self):
+        self.assertEqual(self.counts(), {'heart': 0, 'star': 0, 'thinking': 0, 'clap': 0})
+        self.assertEqual(self.client.get('/api/articles/999/reactions/get/').status_code, 404)
+
+    def test_invalid_type_is_rejected(self):
+        self.assertEqual(self.react('angry').status_code, 400)
+        self.assertFalse(ReactionCounter.objects.exists())
+
+    def test_recompute_repairs_drifted_counters(self):
+        self.react('clap')
+        self.react('clap', ip='10.0.0.2')
+        ReactionCounter.objects.update(clap=40, heart=3)
+
+        counter, = ReactionCounter.recompute([self.article.pk])
+        self.assertEqual((counter.clap, counter.heart), (2, 0))
+        self.assertEqual(self.counts()['clap'], 2)
+
+
+class CounterBufferTests(TestCase):
+    def setUp(self):
+        topic = DiscussionTopic.objects.create(
+            article=make_article(), title='Memoria', description='', created_by='prof', class_group='3A'
+        )
+        self.post = DiscussionPost.objects.create(topic=topic, author_name='anna', content='...')
+        self.buffer = CounterBuffer(DiscussionPost, 'likes', flush_interval=3600, max_pending=2)
+        # Nothing may stay pending for the exit-time flush, which runs after the test databases are gone.
+        self.addCleanup(lambda: self.buffer._pending.clear())
+
+    def stored_likes(self):
+        return DiscussionPost.objects.values_list('likes', flat=True).get(pk=self.post.pk)
+
+    def test_increments_are_merged_until_flushed(self):
+        self.assertEqual([self.buffer.add(self.post.pk, 1) for _ in range(3)], [1, 2, 3])
+        self.assertEqual(self.buffer.pending(self.post.pk), 3)
+        self.assertEqual(self.stored_likes(), 0)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.stored_likes(), 3)
+        self.assertEqual(self.buffer.pending(self.post.pk), 0)
+
+    def test_flushes_inline_when_full(self):
+        self.buffer.add(self.post.pk, 1)
+        self.buffer.add(self.post.pk + 1, 1)
+        self.assertEqual(self.stored_likes(), 1)
+        self.assertEqual(self.buffer.pending(self.post.pk), 0)
+
+    def test_failed_inline_flush_is_logged_and_kept(self):
+        self.buffer.add(self.post.pk, 1)
+        with mock.patch.object(self.buffer, 'write', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('myapp.buffers', 'ERROR'):
+                self.assertEqual(self.buffer.add(self.post.pk + 1, 1), 1)
+        self.assertEqual(self.buffer.pending(self.post.pk), 1)
+
+        self.buffer.flush()
+        self.assertEqual(self.stored_likes(), 1)
+
+    def test_like_endpoint_counts_each_like_once(self):
+        with mock.patch('myapp.views.discussion_post_likes', self.buffer):
+            path = '/api/discussions/posts/%d/like/' % self.post.pk
+            self.assertEqual([self.client.post(path).json()['likes'] for _ in range(2)], [1, 2])
+            self.buffer.flush()
+            self.assertEqual(self.client.post(path).json()['likes'], 3)
+        self.assertEqual(self.stored_likes(), 2)
+
+    def test_write_buffer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            WriteBuffer()
+
+
+class TelemetryBatchTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        self.article = make_article()
+
+    def track(self, events):
+        return post_json(self.client, '/api/telemetry/batch/', {'events': events})
+
+    def pageview(self, **fields):
+        return dict({'kind': 'pageview', 'article_id': self.article.pk, 'duration': 30, 'scroll_depth': 80}, **fields)
+
+    def test_valid_events_are_stored_in_bulk(self):
+        response = self.track([
+            {'kind': 'interaction', 'article_id': self.article.pk, 'type': 'click', 'element': 'pdf'},
+            self.pageview(),
+            self.pageview(duration=None, scroll_depth=None),
+        ])
+
+        self.assertEqual(response.json(), {'accepted': 3, 'rejected': 0})
+        self.assertEqual(list(Interaction.objects.values_list('type', 'element')), [('click', 'pdf')])
+        self.assertEqual(
+            sorted(PageView.objects.values_list('duration', 'scroll_depth'), key=str), [(30, 80.0), (None, None)]
+        )
+        self.assertEqual(PageViewDailyRollup.objects.get().views, 2)
+
+    def test_invalid_events_are_rejected_one_by_one(self):
+        response = self.client.post('/api/telemetry/batch/', json.dumps({'events': [
+            self.pageview(),
+            self.pageview(duration=float('nan')),
+            self.pageview(duration=float('inf')),
+            self.pageview(duration=1e300),
+            self.pageview(scroll_depth=-1),
+            self.pageview(scroll_depth=True),
+            self.pageview(article_id=self.article.pk + 1),
+            {'kind': 'interaction', 'article_id': self.article.pk, 'type': 'teleport'},
+            {'kind': 'purchase', 'article_id': self.article.pk},
+            'not an event',
+        ]}), content_type='application/json')
+
+        self.assertEqual(response.json(), {'accepted': 1, 'rejected': 9})
+        self.assertEqual(PageView.objects.count(), 1)
+        self.assertFalse(Interaction.objects.exists())
+
+    def test_malformed_batches_are_refused(self):
+        self.assertEqual(self.track('events').status_code, 400)
+        self.assertEqual(self.track([self.pageview()] * 101).status_code, 400)
+        self.assertEqual(
+            self.client.post('/api/telemetry/batch/', 'nope', content_type='application/json').status_code, 400
+        )
+        self.assertFalse(PageView.objects.exists())
+
+
+class ProgressBufferTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        self.article = make_article()
+        self.key = ('anna', '3A', self.article.pk)
+        self.buffer = ProgressBuffer(flush_interval=3600)
+        self.addCleanup(lambda: self.buffer._pending.clear())
+
+    def heartbeat(self, completion, seconds, when):
+        return self.buffer.add(self.key, {
+            'completion_percentage': completion, 'time_spent': seconds, 'last_accessed': when
+        })
+
+    def test_heartbeats_are_coalesced(self):
+        start = timezone.now() - timedelta(minutes=5)
+        self.heartbeat(10, 15, start)
+        merged = self.heartbeat(25, 15, start + timedelta(seconds=15))
+        self.assertEqual(merged, {
+            'completion_percentage': 25, 'time_spent': 30, 'last_accessed': start + timedelta(seconds=15)
+        })
+
+        self.buffer.flush()
+        progress = StudentProgress.objects.get()
+        self.assertEqual((progress.completion_percentage, progress.time_spent), (25, 30))
+        self.assertEqual(progress.last_accessed, start + timedelta(seconds=15))
+
+    def test_flush_adds_to_the_stored_time(self):
+        start = timezone.now() - timedelta(minutes=5)
+        self.heartbeat(10, 15, start)
+        self.buffer.flush()
+        self.heartbeat(40, 20, start + timedelta(minutes=1))
+        self.buffer.flush()
+
+        progress = StudentProgress.objects.get()
+        self.assertEqual((progress.completion_percentage, progress.time_spent), (40, 35))
+        self.assertEqual(progress.last_accessed, start + timedelta(minutes=1))
+
+    def test_endpoints_merge_pending_heartbeats(self):
+        other = make_article('Altro')
+        StudentProgress.objects.create(
+            student_name='anna', class_group='3A', article=self.article, completion_percentage=50, time_spent=100
+        )
+
+        with mock.patch('myapp.views.progress_heartbeats', self.buffer):
+            for article, completion in ((self.article, 60), (other, 5)):
+                response = post_json(self.client, '/api/progress/update/', {
+                    'student_name': 'anna', 'class_group': '3A', 'article_id': article.pk,
+                    'completion_percentage': completion, 'time_increment': 15
+                })
+            self.assertEqual(response.json(), {'completion_percentage': 5, 'time_spent': 15})
+
+            progress = self.client.get('/api/progress/get/', {'student_name': 'anna', 'class_group': '3A'}).json()
+        self.assertEqual(
+            [(row['article_id'], row['completion'], row['time_spent']) for row in progress['progress']],
+            [(self.article.pk, 60, 115), (other.pk, 5, 15)]
+        )
+        self.assertEqual(StudentProgress.objects.get().time_spent, 100)
+
+
+class DailyRollupTests(TestCase):
+    databases = {'default', 'telemetry'}
+    rollup_models = (QuizDailyRollup, StudentDailyRollup, AnnotationDailyRollup, PageViewDailyRollup)
+
+    def setUp(self):
+        clear_caches()
+        self.quiz, self.items = make_quiz(2)
+        presentation = Presentation.objects.create(title='Slides', article=self.quiz.article)
+        self.slide = Slide.objects.create(presentation=presentation, slide_number=1, slide_text='')
+
+    def populate(self):
+        (q0, right0, wrong0), (q1, right1, wrong1) = self.items
+        for student, class_group, answers in (
+            ('anna', '3A', (right0, right1)), ('bruno', '3A', (right0, wrong1)), ('carla', '3B', (wrong0, right1))
+        ):
+            post_json(self.client, '/api/quiz/%d/submit/' % self.quiz.pk, {
+                'student_name': student, 'class_group': class_group, 'time_taken': 60,
+                'responses': [{'question_id': q.pk, 'answer_id': a.pk} for q, a in zip((q0, q1), answers)]
+            })
+        for class_group, is_public in (('3A', True), ('3A', False), ('3B', False)):
+            post_json(self.client, '/api/annotations/add/', {
+                'slide_id': self.slide.pk, 'student_name': 'anna', 'class_group': class_group,
+                'text': 'testo', 'note': 'nota', 'x': 1, 'y': 2, 'is_public': is_public
+            })
+        post_json(self.client, '/api/telemetry/batch/', {
+            'events': [{'kind': 'pageview', 'article_id': self.quiz.article.pk}] * 3
+        })
+
+    def snapshot(self):
+        return {
+            model.__name__: sorted(model.objects.values_list(
+                *[f.attname for f in model._meta.concrete_fields if not f.primary_key]
+            ))
+            for model in self.rollup_models
+        }
+
+    def test_increments_match_a_rebuild(self):
+        self.populate()
+        snapshot = self.snapshot()
+        self.assertEqual(len(snapshot['QuizDailyRollup']), 2)
+
+        rollups.rebuild_rollups()
+
+        self.assertEqual(self.snapshot(), snapshot)
+
+    def test_dashboard_reads_the_rollups(self):
+        self.populate()
+
+        data = self.client.get('/api/teacher/dashboard/', {'class': '3A'}).json()
+
+        [quiz_stats] = data['quiz_stats']
+        self.assertEqual(quiz_stats['attempts_count'], 2)
+        self.assertAlmostEqual(quiz_stats['avg_score'], 200 / 3)
+        self.assertAlmostEqual(quiz_stats['min_score'], 100 / 3)
+        self.assertEqual(quiz_stats['max_score'], 100)
+        self.assertEqual(sorted(s['student_name'] for s in data['active_students']), ['anna', 'bruno'])
+        self.assertEqual([(a['count'], a['public_count']) for a in data['annotation_stats']], [(2, 1)])
+        self.assertEqual(data['popular_articles'], [{'id': self.quiz.article.pk, 'title': 'Articolo', 'views': 3}])
+
+    def test_migration_backfills_existing_rows(self):
+        self.populate()
+        snapshot = self.snapshot()
+        for model in self.rollup_models:
+            model.objects.all().delete()
+
+        migration = import_module('myapp.migrations.0009_daily_rollups')
+        for backfill, model in (
+            (migration.backfill_rollups, QuizDailyRollup), (migration.backfill_pageview_rollups, PageViewDailyRollup)
+        ):
+            backfill(apps, SimpleNamespace(connection=connections[router.db_for_write(model)]))
+
+        self.assertEqual(self.snapshot(), snapshot)
+
+
+class DashboardCacheTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        self.quiz, self.items = make_quiz(1)
+        patcher = mock.patch('myapp.views.build_dashboard', wraps=views.build_dashboard)
+        self.build = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def dashboard(self, class_group):
+        return self.client.get('/api/teacher/dashboard/', {'class': class_group}).json()
+
+    def built_for(self):
+        classes = [call.args[0] for call in self.build.call_args_list]
+        self.build.reset_mock()
+        return classes
+
+    def test_each_class_is_cached_separately(self):
+        for class_group in ('3A', '3A', '3B', 'all', '3B'):
+            self.dashboard(class_group)
+
+        self.assertEqual(self.built_for(), ['3A', '3B', 'all'])
+
+    def test_submission_invalidates_its_class_and_all(self):
+        for class_group in ('3A', '3B', 'all'):
+            self.assertEqual(self.dashboard(class_group)['quiz_stats'], [])
+        self.built_for()
+
+        (question, right, _), = self.items
+        with self.captureOnCommitCallbacks(execute=True):
+            post_json(self.client, '/api/quiz/%d/submit/' % self.quiz.pk, {
+                'student_name': 'anna', 'class_group': '3A', 'time_taken': 60,
+                'responses': [{'question_id': question.pk, 'answer_id': right.pk}]
+            })
+
+        stats = {class_group: self.dashboard(class_group)['quiz_stats'] for class_group in ('3A', '3B', 'all')}
+        self.assertEqual(self.built_for(), ['3A', 'all'])
+        self.assertEqual([s['attempts_count'] for s in stats['3A']], [1])
+        self.assertEqual(stats['3B'], [])
+        self.assertEqual(stats['all'], stats['3A'])
+
+    def test_page_views_invalidate_every_class(self):
+        for class_group in ('3A', '3B', 'all'):
+            self.dashboard(class_group)
+        self.built_for()
+
+        with self.captureOnCommitCallbacks(execute=True, using=router.db_for_write(PageView)):
+            post_json(self.client, '/api/telemetry/batch/', {
+                'events': [{'kind': 'pageview', 'article_id': self.quiz.article.pk}]
+            })
+
+        self.assertEqual(self.dashboard('3B')['popular_articles'][0]['views'], 1)
+        self.dashboard('3A')
+        self.assertEqual(self.built_for(), ['3B', '3A'])
+
+
+class TelemetryArchiveTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        archive_dir = override_settings(TELEMETRY_ARCHIVE_DIR=directory.name)
+        archive_dir.enable()
+        self.addCleanup(archive_dir.disable)
+        self.article, self.other = make_article(), make_article('Altro')
+        self.views = [
+            self.pageview(self.article, datetime(2026, 1, 10, 9), duration=30),
+            self.pageview(self.other, datetime(2026, 1, 31, 23), scroll_depth=50),
+            self.pageview(self.article, datetime(2026, 2, 3, 12)),
+            self.pageview(self.article, datetime(2026, 6, 1, 8)),
+        ]
+
+    def pageview(self, article, timestamp, **fields):
+        pageview = PageView.objects.create(article=article, ip_address='10.0.0.1', user_agent='test', **fields)
+        PageView.objects.filter(pk=pageview.pk).update(timestamp=timezone.make_aware(timestamp))
+        return PageView.objects.values().get(pk=pageview.pk)
+
+    def test_archived_rows_round_trip(self):
+        cutoff = timezone.make_aware(datetime(2026, 3, 1))
+
+        self.assertEqual(archive.archive_before(PageView, cutoff, batch_size=2), 3)
+
+        self.assertEqual(list(PageView.objects.values()), self.views[3:])
+        self.assertEqual(list(archive.iter_archived(PageView)), self.views[:3])
+        self.assertEqual(
+            list(archive.iter_archived(PageView, since=timezone.make_aware(datetime(2026, 2, 1)))), self.views[2:3]
+        )
+        self.assertEqual(list(archive.iter_archived(PageView, article_id=self.other.pk)), self.views[1:2])
+        self.assertEqual(
+            sorted(p.name for p in archive.archive_path(PageView, '2026-01').parent.iterdir()),
+            ['2026-01.csv.gz', '2026-02.csv.gz']
+        )
+
+    def test_rebuilt_rollups_include_archived_views(self):
+        archive.archive_before(PageView, timezone.make_aware(datetime(2026, 3, 1)))
+
+        rollups.rebuild_rollups()
+
+        self.assertEqual(
+            dict(PageViewDailyRollup.objects.values('article_id').annotate(total=Sum('views')).values_list(
+                'article_id', 'total'
+            )),
+            {self.article.pk: 3, self.other.pk: 1}
+        )
+
+
+class QuizStatisticsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.quiz, self.items = make_quiz(4)
+        self.rng = np.random.default_rng(1945)
+
+    def submit(self, count):
+        # Correct answers follow a per-student ability, so the items correlate.
+        matrix = []
+        for i in range(count):
+            ability = self.rng.random()
+            correct = [bool(self.rng.random() < ability) for _ in self.items]
+            attempt = QuizAttempt.objects.create(
+                quiz=self.quiz, student_name='s%d' % i, class_group='3A' if i % 2 else '3B',
+                score=sum(correct), max_score=len(correct), percentage=100 * sum(correct) / len(correct),
+                time_taken=60 + i
+            )
+            QuestionResponse.objects.bulk_create([
+                QuestionResponse(
+                    attempt=attempt, question=question, selected_answer=right if ok else wrong,
+                    is_correct=ok, points_earned=float(ok)
+                )
+                for (question, right, wrong), ok in zip(self.items, correct)
+            ])
+            matrix.append(correct)
+        return np.array(matrix, dtype=np.float64)
+
+    def assert_item_analysis(self, matrix):
+        totals = matrix.sum(axis=1)
+        k = matrix.shape[1]
+        alpha = k / (k - 1) * (1 - matrix.var(axis=0).sum() / totals.var())
+
+        analysis = analytics.update_item_analysis(self.quiz.pk)
+        self.assertEqual(analysis.attempts_count, len(matrix))
+        self.assertAlmostEqual(analysis.cronbach_alpha, alpha)
+
+        stats = {s.question_id: s for s in QuestionItemStats.objects.filter(question__quiz=self.quiz)}
+        for j, (question, right, wrong) in enumerate(self.items):
+            item = stats[question.pk]
+            self.assertAlmostEqual(item.difficulty, matrix[:, j].mean())
+            self.assertAlmostEqual(item.discrimination, np.corrcoef(matrix[:, j], totals - matrix[:, j])[0, 1])
+            self.assertEqual(
+                item.answer_counts,
+                {str(right.pk): int(matrix[:, j].sum()), str(wrong.pk): int(len(matrix) - matrix[:, j].sum())}
+            )
+
+    def test_item_analysis_matches_a_full_recompute(self):
+        self.assert_item_analysis(self.submit(40))
+
+    def test_item_analysis_folds_in_new_attempts(self):
+        first = self.submit(25)
+        self.assert_item_analysis(first)
+        self.assert_item_analysis(np.vstack([first, self.submit(15)]))
+
+    def test_item_analysis_without_new_attempts_writes_nothing(self):
+        self.submit(10)
+        analytics.update_item_analysis(self.quiz.pk)
+        with self.assertNumQueries(2):
+            analysis = analytics.update_item_analysis(self.quiz.pk)
+        self.assertEqual(analysis.attempts_count, 10)
+
+    def test_score_distribution(self):
+        matrix = self.submit(30)
+        percentages = 100 * matrix.mean(axis=1)
+        distribution = analytics.score_distribution(self.quiz.pk, 60)
+
+        self.assertEqual(distribution['attempts'], 30)
+        self.assertAlmostEqual(distribution['pass_rate'], (percentages >= 60).mean())
+        self.assertAlmostEqual(distribution['scores']['mean'], percentages.mean())
+        self.assertAlmostEqual(distribution['scores']['percentiles']['p50'], np.median(percentages))
+        self.assertEqual(sum(distribution['histogram']['counts']), 30)
+        self.assertEqual(
+            {c['class_group']: c['attempts'] for c in distribution['classes']},
+            {'3A': 15, '3B': 15}
+        )
+        self.assertAlmostEqual(
+            {c['class_group']: c['mean'] for c in distribution['classes']}['3A'], percentages[1::2].mean()
+        )
+
+    def test_score_distribution_without_attempts(self):
+        distribution = analytics.score_distribution(self.quiz.pk, 60)
+        self.assertEqual(distribution['attempts'], 0)
+        self.assertIsNone(distribution['pass_rate'])
+        self.assertEqual(distribution['classes'], [])
+
+    def test_cached_distribution_follows_the_passing_score(self):
+        percentages = 100 * self.submit(30).mean(axis=1)
+        path = '/api/teacher/quiz/%d/distribution/' % self.quiz.pk
+        self.assertAlmostEqual(self.client.get(path).json()['pass_rate'], (percentages >= 60).mean())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.passing_score = 80
+            self.quiz.save()
+
+        self.assertAlmostEqual(self.client.get(path).json()['pass_rate'], (percentages >= 80).mean())
+
+
+class DiscussionPagingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.topic = DiscussionTopic.objects.create(
+            article=make_article(), title='Tema', description='', created_by='prof', class_group='3A'
+        )
+        start = timezone.make_aware(datetime(2026, 3, 1, 9))
+        # The last two roots share a timestamp, so the id has to break the tie.
+        self.roots = [self.post(start + timedelta(minutes=min(i, 3))) for i in range(5)]
+        self.replies = [self.post(start + timedelta(hours=1, minutes=i), parent=self.roots[0]) for i in range(3)]
+        self.nested = self.post(start + timedelta(hours=2), parent=self.replies[0])
+
+    def post(self, created_at, parent=None):
+        post = DiscussionPost.objects.create(topic=self.topic, author_name='anna', content='...', parent_post=parent)
+        DiscussionPost.objects.filter(pk=post.pk).update(created_at=created_at)
+        return post
+
+    def posts(self, **params):
+        return self.client.get('/api/discussions/%d/posts/' % self.topic.pk, params)
+
+    def test_cursor_walks_every_root_post_once(self):
+        seen, cursor = [], None
+        while True:
+            data = self.posts(limit=2, depth=1, **({'cursor': cursor} if cursor else {})).json()
+            seen += [post['id'] for post in data['posts']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [post.pk for post in self.roots])
+
+    def test_replies_are_nested_to_the_requested_depth(self):
+        first = self.posts(limit=2, depth=2).json()['posts'][0]
+
+        self.assertEqual([reply['id'] for reply in first['replies']], [r.pk for r in self.replies[:2]])
+        self.assertEqual(first['replies'][0]['replies'], [])
+        more_nested = self.posts(cursor=first['replies'][0]['more_replies']).json()
+        self.assertEqual([post['id'] for post in more_nested['posts']], [self.nested.pk])
+
+        rest = self.posts(limit=2, depth=2, cursor=first['more_replies']).json()
+        self.assertEqual([post['id'] for post in rest['posts']], [self.replies[2].pk])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_tampered_cursors_are_rejected(self):
+        for cursor in (
+            'not-a-cursor',
+            encode_cursor(['after']),
+            encode_cursor({'after': ['2026-03-01T09:00:00', self.roots[0].pk]}),
+            encode_cursor({'after': ['yesterday', self.roots[0].pk]}),
+            encode_cursor({'after': [timezone.now()]}),
+            encode_cursor({'parent': [self.roots[0].pk]}),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.posts(cursor=cursor).status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def pages(self, queryset, ordering, limit):
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            page = keyset_paginate(queryset, self.factory.get('/', params), ordering)
+            pages.append(list(page.items))
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_cursors_walk_every_row_once(self):
+        for term in 'edcba':
+            GlossaryTerm.objects.create(term=term, definition='')
+        pages = self.pages(GlossaryTerm.objects.all(), ['term'], 2)
+        self.assertEqual([[t.term for t in page] for page in pages], [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_ties_are_broken_by_the_last_field(self):
+        events = [
+            HistoricalEvent.objects.create(
+                date=date(1945, 1, 27), title=str(i), short_description='', full_description=''
+            )
+            for i in range(5)
+        ]
+        pages = self.pages(HistoricalEvent.objects.all(), ['-date', 'id'], 2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([e.pk for page in pages for e in page], [e.pk for e in events])
+
+    def test_cursor_survives_inserts_before_it(self):
+        for term in 'bcd':
+            GlossaryTerm.objects.create(term=term, definition='')
+        first = keyset_paginate(GlossaryTerm.objects.all(), self.factory.get('/', {'limit': 2}), ['term'])
+        GlossaryTerm.objects.create(term='a', definition='')
+        second = keyset_paginate(
+            GlossaryTerm.objects.all(), self.factory.get('/', {'limit': 2, 'cursor': first.next_cursor}), ['term']
+        )
+        self.assertEqual([t.term for t in second.items], ['d'])
+
+    def test_malformed_input_raises_value_error(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'limit': '0'}, {'limit': 'x'}):
+            with self.assertRaises(ValueError):
+                keyset_paginate(GlossaryTerm.objects.all(), self.factory.get('/', params), ['term'])
+
+
+class CollaborativeNoteTests(TestCase):
+    def setUp(self):
+        self.article = make_article()
+
+    def patch(self, position, removed, inserted):
+        return {'position': position, 'removed': removed, 'inserted': inserted}
+
+    def test_patches_apply_in_order(self):
+        note = notes.commit_patch(self.article.pk, '3A', 0, self.patch(0, 0, 'ciao'), 'anna')
+        self.assertEqual((note.content, note.version), ('ciao', 1))
+
+        note = notes.commit_patch(self.article.pk, '3A', 1, self.patch(4, 0, ' mondo'), 'luca')
+        self.assertEqual((note.content, note.version), ('ciao mondo', 2))
+        self.assertEqual(note.contributors, ['anna', 'luca'])
+        self.assertEqual(
+            notes.patches_since(note, 0),
+            [
+                {'version': 1, 'position': 0, 'removed': 0, 'inserted': 'ciao'},
+                {'version': 2, 'position': 4, 'removed': 0, 'inserted': ' mondo'},
+            ]
+        )
+
+    def test_stale_base_version_conflicts(self):
+        notes.commit_patch(self.article.pk, '3A', 0, self.patch(0, 0, 'ciao'), 'anna')
+        notes.commit_patch(self.article.pk, '3A', 1, self.patch(0, 4, 'salve'), 'anna')
+
+        with self.assertRaises(notes.NoteConflict) as raised:
+            notes.commit_patch(self.article.pk, '3A', 1, self.patch(0, 0, 'x'), 'luca')
+        self.assertEqual(raised.exception.note.version, 2)
+        self.assertEqual(CollaborativeNote.objects.get().content, 'salve')
+
+    def test_creating_an_existing_note_conflicts(self):
+        notes.commit_patch(self.article.pk, '3A', 0, self.patch(0, 0, 'ciao'), 'anna')
+        with self.assertRaises(notes.NoteConflict):
+            notes.commit_patch(self.article.pk, '3A', 0, self.patch(0, 0, 'x'), 'luca')
+
+    def test_patch_outside_the_note_is_rejected(self):
+        notes.commit_patch(self.article.pk, '3A', 0, self.patch(0, 0, 'ciao'), 'anna')
+        with self.assertRaises(ValueError):
+            notes.commit_patch(self.article.pk, '3A', 1, self.patch(2, 5, ''), 'anna')
+
+    def test_update_view_returns_missing_patches_on_conflict(self):
+        def post(base_version, patch):
+            return post_json(self.client, '/api/notes/collaborative/update/', {
+                'article_id': self.article.pk,
+                'class_group': '3A',
+                'contributor': 'anna',
+                'base_version': base_version,
+                'patch': patch,
+            })
+
+        self.assertEqual(post(0, self.patch(0, 0, 'ciao')).json()['version'], 1)
+        self.assertEqual(post(1, self.patch(4, 0, '!')).json()['version'], 2)
+
+        response = post(1, self.patch(0, 0, 'x'))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {
+            'error': 'Version conflict',
+            'version': 2,
+            'patches': [{'version': 2, 'position': 4, 'removed': 0, 'inserted': '!'}],
+        })
+
+
+class PushTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = pubsub.InProcessBroker()
+        patcher = mock.patch('myapp.push.get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def connect(self, query, path=push.PUSH_PATH):
+        self.inbox, self.outbox = asyncio.Queue(), asyncio.Queue()
+        await self.inbox.put({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': path, 'query_string': query.encode()}
+        self.app = asyncio.ensure_future(push.websocket_application(scope, self.inbox.get, self.outbox.put))
+        return await self.sent()
+
+    async def sent(self):
+        return await asyncio.wait_for(self.outbox.get(), 1)
+
+    async def event(self):
+        return json.loads((await self.sent())['text'])
+
+    async def frame(self, data):
+        await self.inbox.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+        await self.settle()
+
+    async def settle(self):
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    async def disconnect(self):
+        await self.inbox.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(self.app, 1)
+
+    async def test_events_follow_the_subscribed_channels(self):
+        accepted = await self.connect('channel=article:1&channel=bogus&class_group=3A')
+        self.assertEqual(accepted, {'type': 'websocket.accept'})
+
+        self.broker.publish('article:2', {'type': 'reaction'})
+        self.broker.publish('slide:3', {'type': 'annotation', 'class_group': '3B'})
+        self.broker.publish('article:1', {'type': 'reaction', 'count': 1})
+        self.assertEqual(await self.event(), {'type': 'reaction', 'count': 1, 'channel': 'article:1'})
+
+        await self.frame({'subscribe': ['slide:3'], 'unsubscribe': ['article:1']})
+        self.broker.publish('article:1', {'type': 'reaction'})
+        self.broker.publish('slide:3', {'type': 'annotation', 'class_group': '3B'})
+        self.broker.publish('slide:3', {'type': 'annotation', 'class_group': '3B', 'is_public': True})
+        self.broker.publish('slide:3', {'type': 'annotation', 'class_group': '3A'})
+        self.assertTrue((await self.event())['is_public'])
+        self.assertEqual((await self.event())['class_group'], '3A')
+        await self.settle()
+        self.assertTrue(self.outbox.empty())
+
+        await self.disconnect()
+        self.assertEqual(self.broker._subscribers, {})
+
+    async def test_resubscribing_takes_no_extra_room(self):
+        with mock.patch('myapp.push.MAX_CHANNELS', 2):
+            await self.connect('channel=article:1')
+            await self.frame({'subscribe': ['article:1', 'article:2', 'article:3']})
+
+            self.assertEqual(set(self.broker._subscribers), {'article:1', 'article:2'})
+            await self.disconnect()
+
+    async def test_unknown_path_is_closed(self):
+        self.assertEqual(await self.connect('', path='/ws/other/'), {'type': 'websocket.close', 'code': 4404})
+
+
+class PublishOnCommitTests(TestCase):
+    def test_events_are_published_after_commit(self):
+        broker = mock.Mock()
+        with mock.patch('myapp.pubsub.get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks() as callbacks:
+                pubsub.publish('article:1', {'type': 'reaction'})
+            broker.publish.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+        broker.publish.assert_called_once_with('article:1', {'type': 'reaction'})
+
+
+class TelemetryRouterTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def test_telemetry_models_are_routed_to_their_own_database(self):
+        for model in (PageView, Interaction, Reaction, ReactionCounter, StudentProgress, PageViewDailyRollup):
+            self.assertEqual((router.db_for_read(model), router.db_for_write(model)), (TELEMETRY_DB, TELEMETRY_DB))
+        for model in (Article, Quiz, QuizDailyRollup):
+            self.assertEqual((router.db_for_read(model), router.db_for_write(model)), ('default', 'default'))
+
+    def test_tables_are_only_migrated_on_their_database(self):
+        telemetry_router = TelemetryRouter()
+        self.assertTrue(telemetry_router.allow_migrate(TELEMETRY_DB, 'myapp', 'pageview'))
+        self.assertFalse(telemetry_router.allow_migrate('default', 'myapp', 'pageview'))
+        self.assertFalse(telemetry_router.allow_migrate(TELEMETRY_DB, 'myapp', 'article'))
+        self.assertFalse(telemetry_router.allow_migrate(TELEMETRY_DB, 'auth', 'user'))
+        self.assertTrue(telemetry_router.allow_migrate('default', 'auth', 'user'))
+
+        self.assertIn(PageView._meta.db_table, connections[TELEMETRY_DB].introspection.table_names())
+        self.assertNotIn(PageView._meta.db_table, connections['default'].introspection.table_names())
+        self.assertNotIn(Article._meta.db_table, connections[TELEMETRY_DB].introspection.table_names())
+
+    def test_telemetry_rows_reference_content_by_id(self):
+        article = make_article()
+        PageView.objects.create(article=article, ip_address='10.0.0.1', user_agent='test')
+
+        self.assertEqual(PageView.objects.using(TELEMETRY_DB).get().article_id, article.pk)
+        self.assertEqual(PageView.objects.get().article, article)
+
+    def test_rebuild_reaction_counters_command(self):
+        article = make_article()
+        Reaction.objects.create(article=article, type='star', ip_address='10.0.0.1')
+        ReactionCounter.objects.create(article=article, star=7)
+
+        call_command('rebuild_reaction_counters', article.pk, stdout=mock.Mock())
+
+        self.assertEqual(ReactionCounter.objects.using(TELEMETRY_DB).get().star, 1)
+
+
+class ViewCacheTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        GlossaryTerm.objects.create(term='Shoah', definition='')
+
+    def terms(self, **params):
+        return [t['term'] for t in self.client.get('/api/glossary_terms/', params).json()['terms']]
+
+    def stats(self):
+        return caching.cache_stats()['glossary']
+
+    def test_responses_are_cached_per_relevant_params(self):
+        self.assertEqual(self.terms(), ['Shoah'])
+        self.assertEqual(self.terms(utm_source='x'), ['Shoah'])
+        self.assertEqual(self.terms(limit=1), ['Shoah'])
+
+        self.assertEqual((self.stats()['hits'], self.stats()['misses']), (1, 2))
+
+    def test_edits_show_up_once_committed(self):
+        self.terms()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            GlossaryTerm.objects.create(term='Memoria', definition='')
+        self.assertEqual(self.terms(), ['Shoah'])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.terms(), ['Memoria', 'Shoah'])
+
+    def test_unchanged_content_answers_304(self):
+        etag = self.client.get('/api/glossary_terms/')['ETag']
+
+        self.assertEqual(self.client.get('/api/glossary_terms/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossaryTerm.objects.create(term='Memoria', definition='')
+        self.assertEqual(self.client.get('/api/glossary_terms/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_reaction_stamps_bump_after_the_telemetry_commit(self):
+        article = make_article()
+        namespace = caching.reactions_namespace(article.pk)
+        before = caching.get_versions(namespace)
+
+        with self.captureOnCommitCallbacks(using=TELEMETRY_DB) as callbacks:
+            Reaction.objects.create(article=article, type='heart', ip_address='10.0.0.1')
+        self.assertEqual(caching.get_versions(namespace), before)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(caching.get_versions(namespace), before)
+
+    def test_stats_are_staff_only(self):
+        self.terms()
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 302)
+
+        self.client.force_login(User.objects.create_user('prof', is_staff=True))
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.json()['views']['glossary'], {'hits': 0, 'misses': 1, 'hit_rate': 0.0})
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        media = override_settings(MEDIA_ROOT=str(self.root / 'media'), IMAGE_VARIANT_WIDTHS=(320, 640, 960))
+        media.enable()
+        self.addCleanup(media.disable)
+        storage = FileSystemStorage(location=self.root / 'variants', base_url='/media/variants/')
+        patcher = mock.patch('myapp.images.variant_storage', storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def picture(self, size, mode='RGB'):
+        buffer = io.BytesIO()
+        PILImage.new(mode, size, 'red').save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue(), name='mappa.png')
+
+    def test_variants_are_generated_on_save_and_removed_on_delete(self):
+        term = GlossaryTerm(term='Shoah', definition='')
+        term.image.save('mappa.png', self.picture((800, 400), 'RGBA'), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            term.save()
+
+        variants = ImageVariant.objects.filter(source=term.image.name)
+        self.assertEqual(
+            sorted(variants.values_list('format', 'width', 'height')),
+            [('jpeg', 320, 160), ('jpeg', 640, 320), ('jpeg', 800, 400),
+             ('webp', 320, 160), ('webp', 640, 320), ('webp', 800, 400)]
+        )
+        for variant in variants:
+            with PILImage.open(self.root / 'variants' / variant.file) as encoded:
+                self.assertEqual((encoded.format.lower(), encoded.width), (variant.format, variant.width))
+
+        srcset = images.srcsets_for([term.image.name])[term.image.name]
+        self.assertEqual(
+            srcset['webp'],
+            ', '.join('/media/variants/glossary/mappa-%dw.webp %dw' % (w, w) for w in (320, 640, 800))
+        )
+        self.assertEqual(self.client.get('/api/glossary_terms/').json()['terms'][0]['image_srcset'], srcset)
+
+        term.delete()
+        self.assertFalse(ImageVariant.objects.exists())
+        self.assertEqual(list((self.root / 'variants' / 'glossary').iterdir()), [])
+
+    def test_small_images_are_not_upscaled(self):
+        term = GlossaryTerm(term='Shoah', definition='')
+        term.image.save('mappa.png', self.picture((200, 100)), save=False)
+
+        variants = images.generate_variants(term.image)
+
+        self.assertEqual(sorted((v.format, v.width) for v in variants), [('jpeg', 200), ('webp', 200)])
+
+    def test_undecodable_images_get_no_variants(self):
+        term = GlossaryTerm(term='Shoah', definition='')
+        term.image.save('mappa.png', ContentFile(b'not a picture'), save=False)
+
+        with self.assertLogs('myapp.images', 'ERROR'):
+            self.assertEqual(images.generate_variants(term.image), [])
+        self.assertFalse(ImageVariant.objects.exists())
+
+
+class SplitTitleTests(SimpleTestCase):
+    def test_first_line_is_the_title(self):
+        self.assertEqual(pdf_pages.split_title('\n  \nLe leggi razziali\n1938\nin Italia\n'), (
+            'Le leggi razziali', '1938\nin Italia'
+        ))
+
+    def test_leading_capital_lines_are_joined(self):
+        self.assertEqual(pdf_pages.split_title('GIORNATA\nDELLA MEMORIA\n\nIntroduzione'), (
+            'GIORNATA DELLA MEMORIA', 'Introduzione'
+        ))
+
+    def test_empty_and_long_pages(self):
+        self.assertEqual(pdf_pages.split_title(' \n\n'), ('', ''))
+        title, body = pdf_pages.split_title('x' * 400)
+        self.assertEqual((len(title), body), (pdf_pages.TITLE_MAX_LENGTH, ''))
+
+
+class IngestPdfTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.article = make_article()
+
+    def attach_pdf(self, *colors):
+        buffer = io.BytesIO()
+        pages = [PILImage.new('RGB', (120, 90), color) for color in colors]
+        pages[0].save(buffer, 'PDF', save_all=True, append_images=pages[1:], resolution=72)
+        if self.article.pdf.name and default_storage.exists(self.article.pdf.name):
+            default_storage.delete(self.article.pdf.name)
+        self.article.pdf.save('articolo.pdf', ContentFile(buffer.getvalue()))
+
+    def ingest(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            'ingest_pdf', self.article.pk, '--workers', '1', '--dpi', '72', *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def images(self):
+        return list(Image.objects.filter(slide__presentation__article=self.article).order_by('slide__slide_number'))
+
+    def test_pages_become_slides_with_images(self):
+        self.attach_pdf('red', 'green', 'blue')
+
+        self.assertIn('3 of 3 page(s) ingested', self.ingest()[0])
+
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.slides_number, self.article.images_number), (3, 3))
+        images = self.images()
+        self.assertEqual([i.slide.slide_number for i in images], [1, 2, 3])
+        for image, color in zip(images, ((255, 0, 0), (0, 128, 0), (0, 0, 255))):
+            with PILImage.open(default_storage.path(image.image_file.name)) as page:
+                self.assertEqual(page.size, (120, 90))
+                pixel = page.convert('RGB').getpixel((60, 45))
+                self.assertLessEqual(max(abs(a - b) for a, b in zip(pixel, color)), 2)
+
+    def test_reruns_skip_stored_pages_unless_forced(self):
+        self.attach_pdf('red', 'green')
+        self.ingest()
+        names = [i.image_file.name for i in self.images()]
+
+        self.assertIn('0 of 2 page(s) ingested', self.ingest()[0])
+        self.assertIn('2 of 2 page(s) ingested', self.ingest('--force')[0])
+        self.assertEqual([i.image_file.name for i in self.images()], names)
+        self.assertEqual(Slide.objects.count(), 2)
+
+    def test_replaced_pdf_drops_stale_page_images(self):
+        self.attach_pdf('red', 'green', 'blue')
+        self.ingest()
+        old = [i.image_file.name for i in self.images()]
+
+        self.attach_pdf('white', 'black')
+        stdout, stderr = self.ingest()
+
+        self.assertIn('2 of 2 page(s) ingested', stdout)
+        self.assertIn('1 slide(s) beyond page 2 left untouched', stderr)
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertEqual(len(self.images()), 2)
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.slides_number, self.article.images_number), (2, 2))
+
+
+class ContentImportTests(TestCase):
+    def fixture(self, definition='Campo di sterminio'):
+        return io.StringIO(json.dumps([
+            {'model': 'myapp.article', 'pk': 7, 'fields': {
+                'article_title': 'Auschwitz', 'pdf': 'a.pdf', 'smart_description': '', 'slides_number': 1,
+                'images_number': 0, 'group': ''
+            }},
+            {'model': 'myapp.quiz', 'pk': 3, 'fields': {
+                'article': 7, 'title': 'Quiz', 'description': '', 'difficulty': 'facile'
+            }},
+            {'model': 'myapp.question', 'pk': 5, 'fields': {
+                'quiz': 3, 'question_type': 'true_false', 'text': 'Vero?', 'explanation': ''
+            }},
+            {'model': 'myapp.glossaryterm', 'pk': 1, 'fields': {
+                'term': 'Lager', 'definition': definition, 'related_articles': [7]
+            }},
+        ]))
+
+    def test_rerun_is_idempotent(self):
+        first = import_content(self.fixture())
+        self.assertEqual(first.stats['myapp.article']['created'], 1)
+        term = GlossaryTerm.objects.get()
+        self.assertEqual(list(term.related_articles.values_list('article_title', flat=True)), ['Auschwitz'])
+
+        second = import_content(self.fixture())
+        for label, counts in second.stats.items():
+            self.assertEqual((counts['created'], counts['updated'], counts['unchanged']), (0, 0, 1), label)
+        self.assertFalse(any(second.touched.values()))
+        self.assertEqual(
+            [Article.objects.count(), Quiz.objects.count(), Question.objects.count(), GlossaryTerm.objects.count()],
+            [1, 1, 1, 1]
+        )
+
+    def test_changed_rows_are_updated_in_place(self):
+        import_content(self.fixture())
+        term = GlossaryTerm.objects.get()
+
+        importer = import_content(self.fixture(definition='Campo di concentramento'))
+        self.assertEqual(importer.stats['myapp.glossaryterm']['updated'], 1)
+        self.assertEqual(importer.stats['myapp.article']['unchanged'], 1)
+        term.refresh_from_db()
+        self.assertEqual(term.definition, 'Campo di concentramento')
+
+    def test_unknown_field_is_rejected(self):
+        stream = io.StringIO(json.dumps([{'model': 'myapp.glossaryterm', 'fields': {'term': 'x', 'colour': 'red'}}]))
+        with self.assertRaises(FixtureError):
+            import_content(stream)
+        self.assertFalse(GlossaryTerm.objects.exists())
+
+
+class AsyncViewTests(TestCase):
+    databases = {'default', 'telemetry'}
+
+    def setUp(self):
+        clear_caches()
+        self.articles = [make_article('Articolo %d' % i) for i in range(3)]
+        ReactionCounter.objects.create(article=self.articles[0], heart=2, clap=1)
+        for article in self.articles:
+            StudentProgress.objects.create(
+                student_name='anna', class_group='3A', article=article, completion_percentage=50, time_spent=60
+            )
+        notes.commit_patch(self.articles[0].pk, '3A', 0, {'position': 0, 'removed': 0, 'inserted': 'ciao'}, 'anna')
+
+    async def get_json(self, path, **params):
+        response = await self.async_client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_read_views_answer_under_asgi(self):
+        reactions = await self.get_json('/api/articles/%d/reactions/get/' % self.articles[0].pk)
+        self.assertEqual(reactions['reactions'], {'heart': 2, 'star': 0, 'thinking': 0, 'clap': 1})
+
+        first = await self.get_json('/api/progress/get/', student_name='anna', class_group='3A', limit=2)
+        rest = await self.get_json(
+            '/api/progress/get/', student_name='anna', class_group='3A', limit=2, cursor=first['next_cursor']
+        )
+        self.assertEqual(
+            [p['article_title'] for p in first['progress'] + rest['progress']], [a.article_title for a in self.articles]
+        )
+        self.assertIsNone(rest['next_cursor'])
+
+        note = await self.get_json(
+            '/api/notes/collaborative/get/', article_id=self.articles[0].pk, class_group='3A', since=0
+        )
+        self.assertEqual(note['patches'], [{'version': 1, 'position': 0, 'removed': 0, 'inserted': 'ciao'}])
+
+    def test_middleware_keeps_the_request_async(self):
+        async def async_view(request):
+            pass
+
+        def sync_view(request):
+            pass
+
+        for middleware in (WhiteNoiseMiddleware, RateLimitMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware(async_view)))
+            self.assertFalse(iscoroutinefunction(middleware(sync_view)))
+
+    @override_settings(WHITENOISE_AUTOREFRESH=True, WHITENOISE_USE_FINDERS=True)
+    async def test_static_files_are_served_under_asgi(self):
+        response = await self.async_client.get('/static/push.js')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'class PushChannel', b''.join(response.streaming_content))
+
+
+@override_settings(
+    RATE_LIMITS={'track_interaction': {'ip': (1, 3), 'student': (0.5, 2)}},
+    RATE_LIMIT_TRUSTED_PROXIES=0,
+)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit._cache().clear()
+        self.factory = RequestFactory()
+        self.now = 1000.0
+        patcher = mock.patch('myapp.ratelimit.time')
+        patcher.start().time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+    def request(self, ip='10.0.0.1', student=None, **extra):
+        body = {'student_name': student, 'class_group': '3A'} if student else {}
+        return self.factory.post('/', json.dumps(body), content_type='application/json', REMOTE_ADDR=ip, **extra)
+
+    def take(self, request):
+        return ratelimit.take('track_interaction', ratelimit.buckets_for('track_interaction', request))
+
+    def test_burst_then_refill(self):
+        self.assertEqual([self.take(self.request()) for _ in range(4)], [0, 0, 0, 1])
+        self.now += 1
+        self.assertEqual(self.take(self.request()), 0)
+        self.assertEqual(self.take(self.request()), 1)
+
+    def test_buckets_are_per_ip(self):
+        for _ in range(3):
+            self.take(self.request())
+        self.assertTrue(self.take(self.request()))
+        self.assertEqual(self.take(self.request(ip='10.0.0.2')), 0)
+
+    def test_rotating_student_names_does_not_escape_the_ip_bucket(self):
+        waits = [self.take(self.request(student='studente%d' % i)) for i in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertTrue(waits[3])
+
+    def test_student_bucket_tightens_the_limit(self):
+        self.assertEqual([self.take(self.request(student='anna')) for _ in range(3)], [0, 0, 2])
+        # The refused request took no token from the IP bucket.
+        self.assertEqual(self.take(self.request()), 0)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        request = self.request(HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+            request = self.request(HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4')
+            self.assertEqual(ratelimit.client_ip(request), '1.2.3.4')
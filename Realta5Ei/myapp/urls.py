@@ -14,9 +14,12 @@ urlpatterns = [
     path('api/glossary_terms/', views.get_glossary_terms, name='get_glossary_terms'),
     path('api/timeline_events/', views.get_timeline_events, name='get_timeline_events'),
     path('api/interactions/track/', views.track_interaction, name='track_interaction'),
+    path('api/telemetry/batch/', views.track_events, name='track_events'),
     path('api/articles/<str:article_id>/reactions/', views.add_reaction, name='add_reaction'),
     path('api/articles/<str:article_id>/reactions/get/', views.get_article_reactions, name='get_article_reactions'),
     path('api/teacher/dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
+    path('api/teacher/quiz/<int:quiz_id>/distribution/', views.quiz_score_distribution, name='quiz_score_distribution'),
+    path('api/teacher/quiz/<int:quiz_id>/items/', views.quiz_item_analysis, name='quiz_item_analysis'),
     path('api/progress/update/', views.update_student_progress, name='update_student_progress'),
     path('api/progress/get/', views.get_student_progress, name='get_student_progress'),
     path('api/discussions/create/', views.create_discussion_topic, name='create_discussion_topic'),
@@ -26,4 +29,6 @@ urlpatterns = [
     path('api/notes/collaborative/update/', views.update_collaborative_note, name='update_collaborative_note'),
     path('api/notes/collaborative/get/', views.get_collaborative_note, name='get_collaborative_note'),
     path('api/search/', views.search_articles, name='search_articles'),
+    path('api/cache/stats/', views.cache_stats, name='cache_stats'),
+    path('api/ratelimit/stats/', views.ratelimit_stats, name='ratelimit_stats'),
 ]
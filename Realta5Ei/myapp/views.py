@@ -1,13 +1,25 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from .models import Article, Quiz, GlossaryTerm, HistoricalEvent
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q, Avg, Count, Max, Min, F
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import router, transaction
+from django.db.models import Q, Avg, Count, Max, Min, F, Sum, ExpressionWrapper, FloatField
 from django.utils import timezone
+from django.core.cache import cache
 from datetime import timedelta
+from bisect import bisect_right
+from collections import defaultdict
 import json
+import math
 from .models import *
+from . import analytics, caching, images, notes, pubsub, ratelimit, rollups
+from .buffers import CounterBuffer, ProgressBuffer
+from .pagination import (
+    akeyset_paginate, decode_cursor, encode_cursor, keyset_paginate, parse_datetime_key, parse_limit,
+)
+from .quiz_cache import get_compiled_quiz, quiz_namespace
 import numpy as np
 import torch
 import onnxruntime as ort
@@ -17,6 +29,12 @@ ONNX_PATH = "myapp/static/model.onnx"
 CKPT_PATH = "myapp/static/transformer_text_epoch29.pt"
 SRC_SEQ_LEN = 40
 TGT_MAX_LEN = 20
+TELEMETRY_MAX_BATCH = 100
+TELEMETRY_MAX_DURATION = 24 * 60 * 60
+DISCUSSION_PAGE_SIZE = 20
+DISCUSSION_MAX_PAGE_SIZE = 100
+DISCUSSION_DEPTH = 3
+DISCUSSION_MAX_DEPTH = 10
 
 checkpoint = torch.load(CKPT_PATH, map_location="cpu")
 idx2tok = checkpoint["vocab"]
@@ -63,6 +81,11 @@ def greedy_decode(sess: ort.InferenceSession, encoder_src, max_len: int, sos_idx
 sess = ort.InferenceSession("myapp/static/model.onnx", providers=["CPUExecutionProvider"])
 
 
+annotation_likes = CounterBuffer(Annotation, 'likes_count')
+discussion_post_likes = CounterBuffer(DiscussionPost, 'likes')
+progress_heartbeats = ProgressBuffer(flush_interval=15.0, max_pending=1000)
+
+
 def tokenize(text):
     text = text.lower()
     return re.findall(r"\w+|[^\s\w]", text, re.UNICODE)
@@ -76,79 +99,80 @@ def encode_src(text, tok2idx, src_seq_len):
     return torch.tensor(ids, dtype=torch.long).unsqueeze(0)
 
 
-def index(request):
-    articles = Article.objects.all().order_by('article_id')
-    quizzes = Quiz.objects.filter(is_active=True)
-    glossary_terms = GlossaryTerm.objects.all().order_by('term')
-    historical_events = HistoricalEvent.objects.all().order_by('date')
-    slides = Slide.objects.all().order_by('id')
-    presentations = Presentation.objects.all().order_by('presentation_id')
-
-    text = ""
-    for pre in presentations:
-        for slide in slides:
-            if slide.presentation == pre.presentation_id:
-                text += slide.slide_text + "\n"
-
+def generate_description():
+    text = "".join(
+        Presentation.objects.order_by('presentation_id').values_list('source_text', flat=True)
+    )
     encoder_src = encode_src(text, tok2idx, SRC_SEQ_LEN)
+    out_ids = greedy_decode(
+        sess,
+        encoder_src,
+        max_len=20,
+        sos_idx=1,
+        eos_idx=2
+    )
+    tokens = [idx2tok[i] for i in out_ids[0].tolist() if i not in (0, 2)]
+    return " ".join(tokens)
 
-    generated = ""
-    for article in articles:
-        if article.smart_description == "des":
-            out_ids = greedy_decode(
-                sess,
-                encoder_src,
-                max_len=20,
-                sos_idx=1,
-                eos_idx=2
-            )
-            tokens = [idx2tok[i] for i in out_ids[0].tolist() if i not in (0, 2)]
-            generated = " ".join(tokens)
-        else:
-            generated = article.smart_description
 
+@caching.cache_view('homepage', *caching.HOMEPAGE_NAMESPACES, timeout=caching.HOMEPAGE_TIMEOUT)
+def index(request):
+    articles = Article.objects.only(
+        'article_id', 'article_title', 'smart_description', 'slides_number', 'images_number', 'group'
+    ).order_by('article_id')
+    quizzes = Quiz.objects.filter(is_active=True).only(
+        'id', 'title', 'description', 'difficulty', 'time_limit', 'passing_score'
+    )
 
+    generated = ""
+    last_article = list(articles)[-1:]
+    if last_article:
+        if last_article[0].smart_description == "des":
+            generated = generate_description()
+        else:
+            generated = last_article[0].smart_description
 
     context = {
         "articles": articles,
         "quizzes": quizzes,
-        "glossary_terms": glossary_terms,
-        "historical_events": historical_events,
         "generated": generated,
     }
 
-
-
     return render(request, 'index.html', context)
 
 
 def quiz_detail(request, quiz_id):
-    quiz = get_object_or_404(Quiz, pk=quiz_id)
+    compiled = get_compiled_quiz(quiz_id)
+    quiz = compiled['payload']
 
     if request.method == "POST":
         score = 0
-        total_questions = quiz.questions.count()
+        total_questions = len(compiled['question_order'])
         results = []
 
-        for question in quiz.questions.all():
-            answer_id = request.POST.get(f'q_{question.id}')
+        for question_id in compiled['question_order']:
+            question = compiled['questions'][question_id]
+            answer_id = request.POST.get(f'q_{question_id}')
             selected_answer = None
             is_correct = False
 
             if answer_id:
-                selected_answer = get_object_or_404(Answer, pk=answer_id)
-                if selected_answer.is_correct:
+                try:
+                    selected_answer = question['answers'][int(answer_id)]
+                except (KeyError, ValueError):
+                    raise Http404('No Answer matches the given query.')
+                if selected_answer['is_correct']:
                     score += 1
                     is_correct = True
 
             results.append({
-                'question': question.text,
-                'selected': selected_answer.text if selected_answer else "Nessuna risposta",
+                'question': question['text'],
+                'selected': selected_answer['text'] if selected_answer else "Nessuna risposta",
                 'is_correct': is_correct
             })
 
         percentage = (score / total_questions) * 100 if total_questions > 0 else 0
-        passed = percentage >= quiz.passing_score
+        passed = percentage >= quiz['passing_score']
 
         return render(request, 'quiz_detail.html', {
             'quiz': quiz,
@@ -162,10 +186,20 @@ def quiz_detail(request, quiz_id):
 
     return render(request, 'quiz_detail.html', {'quiz': quiz})
 
+@caching.cache_view('article', caching.ARTICLES)
 def article(request, article_id):
-    article = get_object_or_404(Article, article_id=article_id)
+    article = get_object_or_404(
+        Article.objects.prefetch_related('presentations__slides__images'),
+        article_id=article_id
+    )
     context = {
         "article": article,
+        "image_variants": images.srcsets_for(
+            image.image_file.name
+            for presentation in article.presentations.all()
+            for slide in presentation.slides.all()
+            for image in slide.images.all()
+        ),
     }
     return render(request, 'article.html', context)
 
@@ -187,32 +221,50 @@ def get_client_ip(request):
 def article_detail(request, article_id):
     article = get_object_or_404(Article, article_id=article_id)
 
-    PageView.objects.create(
-        article=article,
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-        referrer=request.META.get('HTTP_REFERER', '')
-    )
-
+    # The page view itself is reported by telemetry.js through track_events,
+    # together with its duration and scroll depth.
     return render(request, 'article.html', {'article': article})
 
 
+def annotation_payload(annotation, replies_count):
+    return {
+        'id': annotation.id,
+        'student_name': annotation.student_name,
+        'note': annotation.note,
+        'x': annotation.x_position,
+        'y': annotation.y_position,
+        'color': annotation.color,
+        'created_at': annotation.created_at.isoformat(),
+        'replies_count': replies_count,
+        'likes_count': annotation.likes_count + annotation_likes.pending(annotation.id)
+    }
+
+
 @csrf_exempt
 @require_POST
 def add_annotation(request):
     data = json.loads(request.body)
 
-    annotation = Annotation.objects.create(
-        slide_id=data['slide_id'],
-        student_name=data['student_name'],
-        class_group=data['class_group'],
-        text_selection=data['text'],
-        note=data['note'],
-        x_position=float(data['x']),
-        y_position=float(data['y']),
-        color=data.get('color', '#FFD700'),
-        is_public=data.get('is_public', False)
-    )
+    with transaction.atomic():
+        annotation = Annotation.objects.create(
+            slide_id=data['slide_id'],
+            student_name=data['student_name'],
+            class_group=data['class_group'],
+            text_selection=data['text'],
+            note=data['note'],
+            x_position=float(data['x']),
+            y_position=float(data['y']),
+            color=data.get('color', '#FFD700'),
+            is_public=data.get('is_public', False)
+        )
+        rollups.record_annotation(annotation)
+        transaction.on_commit(lambda: caching.invalidate_dashboard(annotation.class_group))
+        pubsub.publish(pubsub.slide_channel(annotation.slide_id), {
+            'type': 'annotation',
+            'class_group': annotation.class_group,
+            'is_public': annotation.is_public,
+            'annotation': annotation_payload(annotation, 0)
+        })
 
     return JsonResponse({
         'id': annotation.id,
@@ -224,30 +276,23 @@ def add_annotation(request):
 
 
 @require_GET
-def get_slide_annotations(request, slide_id):
+async def get_slide_annotations(request, slide_id):
     class_group = request.GET.get('class_group', '')
 
     annotations = Annotation.objects.filter(
         slide_id=slide_id
     ).filter(
         Q(is_public=True) | Q(class_group=class_group)
-    )
+    ).annotate(replies_total=Count('replies'))
+
+    try:
+        page = await akeyset_paginate(annotations, request, ['-created_at', '-id'], default_limit=100)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
 
     return JsonResponse({
-        'annotations': [
-            {
-                'id': a.id,
-                'student_name': a.student_name,
-                'note': a.note,
-                'x': a.x_position,
-                'y': a.y_position,
-                'color': a.color,
-                'created_at': a.created_at.isoformat(),
-                'replies_count': a.replies.count(),
-                'likes_count': a.likes_count
-            }
-            for a in annotations
-        ]
+        'next_cursor': page.next_cursor,
+        'annotations': [annotation_payload(a, a.replies_total) for a in page.items]
     })
 
 
@@ -262,129 +307,151 @@ def add_annotation_reply(request, annotation_id):
         author_name=data['author_name'],
         content=data['content']
     )
-
-    return JsonResponse({
+    payload = {
         'id': reply.id,
         'author_name': reply.author_name,
         'content': reply.content,
         'created_at': reply.created_at.isoformat()
+    }
+    pubsub.publish(pubsub.slide_channel(annotation.slide_id), {
+        'type': 'annotation_reply',
+        'class_group': annotation.class_group,
+        'is_public': annotation.is_public,
+        'annotation_id': annotation.id,
+        'replies_count': annotation.replies.count(),
+        'reply': payload
     })
 
+    return JsonResponse(payload)
+
 
 @csrf_exempt
 @require_POST
 def like_annotation(request, annotation_id):
-    annotation = get_object_or_404(Annotation, id=annotation_id)
-    annotation.likes_count = F('likes_count') + 1
-    annotation.save()
-    annotation.refresh_from_db()
+    annotation = Annotation.objects.filter(id=annotation_id).values(
+        'likes_count', 'slide_id', 'class_group', 'is_public'
+    ).first()
+    if annotation is None:
+        raise Http404('No Annotation matches the given query.')
+    likes_count = annotation['likes_count'] + annotation_likes.add(annotation_id, 1)
+    pubsub.publish(pubsub.slide_channel(annotation['slide_id']), {
+        'type': 'annotation_likes',
+        'class_group': annotation['class_group'],
+        'is_public': annotation['is_public'],
+        'annotation_id': annotation_id,
+        'likes_count': likes_count
+    })
 
-    return JsonResponse({'likes_count': annotation.likes_count})
+    return JsonResponse({'likes_count': likes_count})
 
 
 @require_GET
+@caching.conditional_on(quiz_namespace)
+@caching.cache_view('quiz-data', quiz_namespace)
 def get_quiz_data(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id)
-
-    return JsonResponse({
-        'id': quiz.id,
-        'title': quiz.title,
-        'description': quiz.description,
-        'difficulty': quiz.difficulty,
-        'time_limit': quiz.time_limit,
-        'passing_score': quiz.passing_score,
-        'questions': [
-            {
-                'id': q.id,
-                'type': q.question_type,
-                'text': q.text,
-                'points': q.points,
-                'answers': [
-                    {
-                        'id': a.id,
-                        'text': a.text
-                    }
-                    for a in q.answers.all()
-                ]
-            }
-            for q in quiz.questions.all()
-        ]
-    })
+    return JsonResponse(get_compiled_quiz(quiz_id)['payload'])
 
 
 @csrf_exempt
 @require_POST
 def submit_quiz(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id)
+    compiled = get_compiled_quiz(quiz_id)
+    questions = compiled['questions']
     data = json.loads(request.body)
 
-    attempt = QuizAttempt.objects.create(
-        quiz=quiz,
-        student_name=data['student_name'],
-        class_group=data['class_group'],
-        time_taken=data['time_taken'],
-        max_score=sum(q.points for q in quiz.questions.all()),
-        score=0,
-        percentage=0
-    )
-
     total_points = 0
     results = []
+    responses = []
+    answered = set()
 
     for response_data in data['responses']:
-        question = Question.objects.get(id=response_data['question_id'])
+        question_id = response_data.get('question_id')
+        question = questions.get(question_id)
+        if question is None or question_id in answered:
+            return JsonResponse({'error': f'Invalid question id: {question_id}'}, status=400)
+        answered.add(question_id)
 
-        if question.question_type == 'open_ended':
+        if question['type'] == 'open_ended':
             is_correct = False
             points = 0
-            selected_answer = None
+            answer_id = None
+            answer = None
             open_answer = response_data.get('answer_text', '')
         else:
-            selected_answer = Answer.objects.get(id=response_data['answer_id'])
-            is_correct = selected_answer.is_correct
-            points = question.points if is_correct else 0
+            answer_id = response_data.get('answer_id')
+            answer = question['answers'].get(answer_id)
+            if answer is None:
+                return JsonResponse({'error': f'Invalid answer id: {answer_id}'}, status=400)
+            is_correct = answer['is_correct']
+            points = question['points'] if is_correct else 0
             open_answer = ''
 
-        QuestionResponse.objects.create(
-            attempt=attempt,
-            question=question,
-            selected_answer=selected_answer,
+        responses.append(QuestionResponse(
+            question_id=question_id,
+            selected_answer_id=answer_id,
             open_answer=open_answer,
             is_correct=is_correct,
             points_earned=points
-        )
+        ))
 
         total_points += points
 
         results.append({
-            'question_id': question.id,
+            'question_id': question_id,
             'is_correct': is_correct,
             'points_earned': points,
-            'explanation': question.explanation if not is_correct else '',
-            'correct_answer': question.answers.filter(
-                is_correct=True).first().text if not is_correct and question.question_type != 'open_ended' else None,
-            'feedback': selected_answer.feedback if selected_answer else ''
+            'explanation': question['explanation'] if not is_correct else '',
+            'correct_answer': question['correct_answer'] if not is_correct and question['type'] != 'open_ended' else None,
+            'feedback': answer['feedback'] if answer else ''
         })
 
-    attempt.score = total_points
-    attempt.percentage = (total_points / attempt.max_score) * 100 if attempt.max_score > 0 else 0
-    attempt.save()
+    max_score = compiled['max_score']
+    percentage = (total_points / max_score) * 100 if max_score > 0 else 0
+
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            quiz_id=compiled['id'],
+            student_name=data['student_name'],
+            class_group=data['class_group'],
+            time_taken=data['time_taken'],
+            max_score=max_score,
+            score=total_points,
+            percentage=percentage
+        )
+        for response in responses:
+            response.attempt = attempt
+        QuestionResponse.objects.bulk_create(responses)
+        rollups.record_quiz_attempt(attempt)
+        transaction.on_commit(lambda: caching.invalidate_dashboard(attempt.class_group))
+        transaction.on_commit(lambda: caching.bump(caching.quiz_attempts_namespace(attempt.quiz_id)))
+        # Folding one attempt into the item statistics is cheap; if it fails the
+        # next submission or `manage.py update_item_analysis` catches up.
+        transaction.on_commit(lambda: analytics.update_item_analysis(attempt.quiz_id), robust=True)
 
     return JsonResponse({
         'score': total_points,
         'max_score': attempt.max_score,
         'percentage': attempt.percentage,
-        'passed': attempt.percentage >= quiz.passing_score,
+        'passed': attempt.percentage >= compiled['passing_score'],
         'results': results,
         'attempt_id': attempt.id
     })
 
 
 @require_GET
+@caching.conditional_on(caching.GLOSSARY, caching.ARTICLES)
+@caching.cache_view('glossary', caching.GLOSSARY, caching.ARTICLES, params=('cursor', 'limit'))
 def get_glossary_terms(request):
-    terms = GlossaryTerm.objects.all()
+    terms = GlossaryTerm.objects.prefetch_related('related_articles')
+
+    try:
+        page = keyset_paginate(terms, request, ['term'], default_limit=100)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    srcsets = images.srcsets_for(t.image.name for t in page.items if t.image)
 
     return JsonResponse({
+        'next_cursor': page.next_cursor,
         'terms': [
             {
                 'id': t.id,
@@ -392,22 +459,32 @@ def get_glossary_terms(request):
                 'definition': t.definition,
                 'extended_explanation': t.extended_explanation,
                 'image': t.image.url if t.image else None,
+                'image_srcset': srcsets.get(t.image.name) if t.image else None,
                 'video_url': t.video_url,
                 'related_articles': [
                     {'id': a.article_id, 'title': a.article_title}
                     for a in t.related_articles.all()
                 ]
             }
-            for t in terms
+            for t in page.items
         ]
     })
 
 
 @require_GET
+@caching.conditional_on(caching.TIMELINE, caching.ARTICLES)
+@caching.cache_view('timeline', caching.TIMELINE, caching.ARTICLES, params=('cursor', 'limit'))
 def get_timeline_events(request):
-    events = HistoricalEvent.objects.all()
+    events = HistoricalEvent.objects.prefetch_related('related_articles')
+
+    try:
+        page = keyset_paginate(events, request, ['date', 'id'], default_limit=100)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    srcsets = images.srcsets_for(e.image.name for e in page.items if e.image)
 
     return JsonResponse({
+        'next_cursor': page.next_cursor,
         'events': [
             {
                 'id': e.id,
@@ -416,13 +493,14 @@ def get_timeline_events(request):
                 'short_description': e.short_description,
                 'full_description': e.full_description,
                 'image': e.image.url if e.image else None,
+                'image_srcset': srcsets.get(e.image.name) if e.image else None,
                 'importance': e.importance,
                 'related_articles': [
                     {'id': a.article_id, 'title': a.article_title}
                     for a in e.related_articles.all()
                 ]
             }
-            for e in events
+            for e in page.items
         ]
     })
 
@@ -442,6 +520,92 @@ def track_interaction(request):
     return JsonResponse({'status': 'tracked'})
 
 
+def telemetry_number(value, maximum):
+    """Parse an optional numeric event field, rejecting non-finite values and values outside [0, maximum]."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise TypeError(value)
+    number = float(value)
+    if not math.isfinite(number) or not 0 <= number <= maximum:
+        raise ValueError(value)
+    return number
+
+
+def parse_telemetry_events(events, request):
+    article_ids = set()
+    for event in events:
+        try:
+            article_ids.add(int(event['article_id']))
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            pass
+    known_articles = set(Article.objects.filter(article_id__in=article_ids).values_list('article_id', flat=True))
+    interaction_types = dict(Interaction.INTERACTION_TYPES)
+
+    ip_address = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
+
+    interactions = []
+    pageviews = []
+    rejected = 0
+    for event in events:
+        try:
+            article_id = int(event['article_id'])
+            if article_id not in known_articles:
+                raise ValueError(article_id)
+
+            if event.get('kind') == 'interaction' and event.get('type') in interaction_types:
+                interactions.append(Interaction(
+                    article_id=article_id,
+                    type=event['type'],
+                    element=str(event.get('element', ''))[:200],
+                    student_name=str(event.get('student_name', ''))[:100]
+                ))
+            elif event.get('kind') == 'pageview':
+                duration = telemetry_number(event.get('duration'), TELEMETRY_MAX_DURATION)
+                pageviews.append(PageView(
+                    article_id=article_id,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    duration=int(duration) if duration is not None else None,
+                    scroll_depth=telemetry_number(event.get('scroll_depth'), 100),
+                    referrer=str(event.get('referrer', ''))[:200]
+                ))
+            else:
+                raise ValueError(event.get('kind'))
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            rejected += 1
+
+    return interactions, pageviews, rejected
+
+
+@csrf_exempt
+@require_POST
+def track_events(request):
+    try:
+        events = json.loads(request.body)['events']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON object with an "events" list'}, status=400)
+
+    if not isinstance(events, list) or len(events) > TELEMETRY_MAX_BATCH:
+        return JsonResponse({'error': f'"events" must be a list of at most {TELEMETRY_MAX_BATCH} items'}, status=400)
+
+    interactions, pageviews, rejected = parse_telemetry_events(events, request)
+
+    using = router.db_for_write(PageView)
+    with transaction.atomic(using=using):
+        Interaction.objects.bulk_create(interactions)
+        PageView.objects.bulk_create(pageviews)
+        rollups.record_pageviews(pageviews)
+        if pageviews:
+            transaction.on_commit(caching.invalidate_dashboard, using=using)
+
+    return JsonResponse({
+        'accepted': len(interactions) + len(pageviews),
+        'rejected': rejected
+    })
+
+
 @csrf_exempt
 @require_POST
 def add_reaction(request, article_id):
@@ -450,19 +614,33 @@ def add_reaction(request, article_id):
     reaction_type = data['type']
     ip_address = get_client_ip(request)
 
-    reaction, created = Reaction.objects.get_or_create(
-        article=article,
-        type=reaction_type,
-        ip_address=ip_address
-    )
+    if reaction_type not in dict(Reaction.REACTION_TYPES):
+        return JsonResponse({'error': f'Invalid reaction type: {reaction_type}'}, status=400)
 
-    if not created:
-        reaction.delete()
-        action = 'removed'
-    else:
-        action = 'added'
+    using = router.db_for_write(Reaction)
+    with transaction.atomic(using=using):
+        reaction, created = Reaction.objects.get_or_create(
+            article=article,
+            type=reaction_type,
+            ip_address=ip_address
+        )
+
+        if not created:
+            reaction.delete()
+            action = 'removed'
+        else:
+            action = 'added'
 
-    count = article.reactions.filter(type=reaction_type).count()
+        counter = ReactionCounter.objects.filter(article=article)
+        if counter.update(**{reaction_type: F(reaction_type) + (1 if created else -1)}):
+            count = counter.values_list(reaction_type, flat=True).get()
+        else:
+            count = getattr(ReactionCounter.recompute([article.article_id])[0], reaction_type)
+        pubsub.publish(pubsub.article_channel(article.article_id), {
+            'type': 'reaction',
+            'reaction_type': reaction_type,
+            'count': count
+        }, using=using)
 
     return JsonResponse({
         'action': action,
@@ -472,12 +650,14 @@ def add_reaction(request, article_id):
 
 @csrf_exempt
 @require_GET
-def get_article_reactions(request, article_id):
-    article = get_object_or_404(Article, article_id=article_id)
+@caching.conditional_on(caching.reactions_namespace)
+async def get_article_reactions(request, article_id):
+    types = [reaction_type for reaction_type, _ in Reaction.REACTION_TYPES]
+    reactions = await ReactionCounter.objects.filter(article_id=article_id).values(*types).afirst()
 
-    reactions = {}
-    for reaction_type, _ in Reaction.REACTION_TYPES:
-        reactions[reaction_type] = article.reactions.filter(type=reaction_type).count()
+    if reactions is None:
+        await aget_object_or_404(Article, article_id=article_id)
+        reactions = dict.fromkeys(types, 0)
 
     return JsonResponse({'reactions': reactions})
 
@@ -485,76 +665,156 @@ def get_article_reactions(request, article_id):
 @require_GET
 def teacher_dashboard(request):
     class_group = request.GET.get('class', 'all')
+    cache_key = caching.versioned_key(
+        'teacher-dashboard', caching.DASHBOARD, caching.dashboard_namespace(class_group)
+    )
 
-    quiz_stats = QuizAttempt.objects.all()
-    if class_group != 'all':
-        quiz_stats = quiz_stats.filter(class_group=class_group)
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = build_dashboard(class_group)
+        cache.set(cache_key, payload, caching.DASHBOARD_TIMEOUT)
 
-    quiz_data = quiz_stats.values('quiz__title').annotate(
-        avg_score=Avg('percentage'),
-        attempts_count=Count('id'),
-        max_score=Max('percentage'),
-        min_score=Min('percentage')
+    return JsonResponse(payload)
+
+
+@require_GET
+def quiz_score_distribution(request, quiz_id):
+    compiled = get_compiled_quiz(quiz_id)
+    # The quiz namespace covers passing_score edits, which change the pass rate.
+    cache_key = caching.versioned_key(
+        'quiz-distribution', quiz_namespace(quiz_id), caching.quiz_attempts_namespace(quiz_id)
     )
 
-    active_students = quiz_stats.values('student_name', 'class_group').annotate(
-        total_attempts=Count('id'),
-        avg_performance=Avg('percentage')
-    ).order_by('-total_attempts')[:10]
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = analytics.score_distribution(compiled['id'], compiled['passing_score'])
+        cache.set(cache_key, payload, caching.ANALYTICS_TIMEOUT)
+
+    return JsonResponse(payload)
+
+
+@require_GET
+def quiz_item_analysis(request, quiz_id):
+    compiled = get_compiled_quiz(quiz_id)
+    # Read-only: the statistics are folded in after each submit_quiz commit.
+    analysis = QuizItemAnalysis.objects.filter(quiz_id=compiled['id']).first()
+    stats = {s.question_id: s for s in QuestionItemStats.objects.filter(question_id__in=compiled['question_order'])}
+
+    items = []
+    for question_id in compiled['question_order']:
+        question = compiled['questions'][question_id]
+        item = stats.get(question_id)
+        answer_counts = item.answer_counts if item else {}
+        items.append({
+            'question_id': question_id,
+            'text': question['text'],
+            'difficulty': item.difficulty if item else None,
+            'discrimination': item.discrimination if item else None,
+            'answers': [
+                {
+                    'id': answer_id,
+                    'text': answer['text'],
+                    'is_correct': answer['is_correct'],
+                    'count': answer_counts.get(str(answer_id), 0)
+                }
+                for answer_id, answer in question['answers'].items()
+            ]
+        })
+
+    return JsonResponse({
+        'quiz_id': compiled['id'],
+        'attempts': analysis.attempts_count if analysis else 0,
+        'cronbach_alpha': analysis.cronbach_alpha if analysis else None,
+        'items': items
+    })
+
 
-    annotation_stats = Annotation.objects.all()
+def build_dashboard(class_group):
+    quiz_rollups = QuizDailyRollup.objects.all()
+    student_rollups = StudentDailyRollup.objects.all()
+    annotation_rollups = AnnotationDailyRollup.objects.all()
     if class_group != 'all':
-        annotation_stats = annotation_stats.filter(class_group=class_group)
+        quiz_rollups = quiz_rollups.filter(class_group=class_group)
+        student_rollups = student_rollups.filter(class_group=class_group)
+        annotation_rollups = annotation_rollups.filter(class_group=class_group)
+
+    quiz_data = quiz_rollups.values('quiz__title').annotate(
+        avg_score=ExpressionWrapper(Sum('percentage_sum') / Sum('attempts_count'), output_field=FloatField()),
+        attempts_count=Sum('attempts_count'),
+        max_score=Max('max_percentage'),
+        min_score=Min('min_percentage')
+    )
+
+    active_students = student_rollups.values('student_name', 'class_group').annotate(
+        total_attempts=Sum('attempts_count'),
+        avg_performance=ExpressionWrapper(Sum('percentage_sum') / Sum('attempts_count'), output_field=FloatField())
+    ).order_by('-total_attempts')[:10]
 
-    annotation_data = annotation_stats.values('slide__presentation__article__article_title').annotate(
-        count=Count('id'),
-        public_count=Count('id', filter=Q(is_public=True))
+    annotation_data = annotation_rollups.values(
+        slide__presentation__article__article_title=F('article__article_title')
+    ).annotate(
+        count=Sum('count'),
+        public_count=Sum('public_count')
     )
 
-    popular_articles = Article.objects.annotate(
-        view_count=Count('pageviews')
-    ).order_by('-view_count')[:5]
+    # Page view rollups live in the telemetry database, so titles are looked up separately.
+    view_counts = dict(
+        PageViewDailyRollup.objects.values('article_id').annotate(views=Sum('views')).order_by('-views')
+        .values_list('article_id', 'views')[:5]
+    )
+    titles = dict(Article.objects.filter(article_id__in=view_counts).values_list('article_id', 'article_title'))
+    popular_articles = [(article_id, titles[article_id], views) for article_id, views in view_counts.items() if article_id in titles]
+    if len(popular_articles) < 5:
+        popular_articles += [
+            (article_id, title, 0)
+            for article_id, title in Article.objects.exclude(article_id__in=titles).values_list(
+                'article_id', 'article_title'
+            )[:5 - len(popular_articles)]
+        ]
 
-    return JsonResponse({
+    return {
         'quiz_stats': list(quiz_data),
         'active_students': list(active_students),
         'annotation_stats': list(annotation_data),
         'popular_articles': [
             {
-                'id': a.article_id,
-                'title': a.article_title,
-                'views': a.view_count
+                'id': article_id,
+                'title': title,
+                'views': views
             }
-            for a in popular_articles
+            for article_id, title, views in popular_articles
         ]
-    })
+    }
 
 
 @csrf_exempt
 @require_POST
 def update_student_progress(request):
     data = json.loads(request.body)
-
-    progress, created = StudentProgress.objects.update_or_create(
-        student_name=data['student_name'],
-        class_group=data['class_group'],
-        article_id=data['article_id'],
-        defaults={
-            'completion_percentage': data['completion_percentage'],
-            'time_spent': F('time_spent') + data['time_increment']
-        }
-    )
-
-    progress.refresh_from_db()
+    key = (data['student_name'], data['class_group'], int(data['article_id']))
+
+    stored = StudentProgress.objects.filter(
+        student_name=key[0],
+        class_group=key[1],
+        article_id=key[2]
+    ).values_list('time_spent', flat=True).first()
+    if stored is None:
+        get_object_or_404(Article, article_id=key[2])
+
+    pending = progress_heartbeats.add(key, {
+        'completion_percentage': float(data['completion_percentage']),
+        'time_spent': int(data['time_increment']),
+        'last_accessed': timezone.now()
+    })
 
     return JsonResponse({
-        'completion_percentage': progress.completion_percentage,
-        'time_spent': progress.time_spent
+        'completion_percentage': pending['completion_percentage'],
+        'time_spent': (stored or 0) + pending['time_spent']
     })
 
 
 @require_GET
-def get_student_progress(request):
+async def get_student_progress(request):
     student_name = request.GET.get('student_name')
     class_group = request.GET.get('class_group')
 
@@ -563,18 +823,49 @@ def get_student_progress(request):
         class_group=class_group
     )
 
-    return JsonResponse({
-        'progress': [
-            {
-                'article_id': p.article.article_id,
-                'article_title': p.article.article_title,
-                'completion': p.completion_percentage,
-                'time_spent': p.time_spent,
-                'last_accessed': p.last_accessed.isoformat()
-            }
-            for p in progress
-        ]
-    })
+    try:
+        page = await akeyset_paginate(progress, request, ['article_id'])
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    # Buffered rows not flushed yet belong to the page covering their article id.
+    lower = page.after[0] if page.after else None
+    upper = page.items[-1].article_id if page.next_cursor else None
+    pending = {
+        article_id: buffered
+        for article_id, buffered in progress_heartbeats.pending_for(student_name, class_group).items()
+        if (lower is None or article_id > lower) and (upper is None or article_id <= upper)
+    }
+
+    titles = {
+        article_id: title
+        async for article_id, title in Article.objects.filter(
+            article_id__in=[p.article_id for p in page.items] + list(pending)
+        ).values_list('article_id', 'article_title')
+    }
+
+    rows = []
+    for p in page.items:
+        buffered = pending.pop(p.article_id, None)
+        rows.append({
+            'article_id': p.article_id,
+            'article_title': titles.get(p.article_id, ''),
+            'completion': buffered['completion_percentage'] if buffered else p.completion_percentage,
+            'time_spent': p.time_spent + (buffered['time_spent'] if buffered else 0),
+            'last_accessed': (buffered['last_accessed'] if buffered else p.last_accessed).isoformat()
+        })
+
+    for article_id, buffered in pending.items():
+        rows.append({
+            'article_id': article_id,
+            'article_title': titles.get(article_id, ''),
+            'completion': buffered['completion_percentage'],
+            'time_spent': buffered['time_spent'],
+            'last_accessed': buffered['last_accessed'].isoformat()
+        })
+    rows.sort(key=lambda row: row['article_id'])
+
+    return JsonResponse({'progress': rows, 'next_cursor': page.next_cursor})
 
 
 @csrf_exempt
@@ -619,40 +910,83 @@ def add_discussion_post(request, topic_id):
 
 
 @require_GET
-def get_discussion_posts(request, topic_id):
-    topic = get_object_or_404(DiscussionTopic, id=topic_id)
-    posts = topic.posts.filter(parent_post=None)
+async def get_discussion_posts(request, topic_id):
+    topic = await aget_object_or_404(DiscussionTopic, id=topic_id)
 
-    def serialize_post(post):
+    try:
+        limit = parse_limit(request.GET.get('limit'), DISCUSSION_PAGE_SIZE, DISCUSSION_MAX_PAGE_SIZE)
+        depth = parse_limit(request.GET.get('depth'), DISCUSSION_DEPTH, DISCUSSION_MAX_DEPTH)
+        position = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else {}
+        parent_id = position.get('parent')
+        if parent_id is not None and not isinstance(parent_id, int):
+            raise ValueError(parent_id)
+        after = parse_datetime_key(position['after']) if position.get('after') else None
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Invalid limit, depth or cursor'}, status=400)
+
+    children = defaultdict(list)
+    async for post in topic.posts.order_by('created_at', 'id'):
+        children[post.parent_post_id].append(post)
+
+    def page(parent, after, levels):
+        siblings = children.get(parent, [])
+        start = bisect_right([(p.created_at, p.id) for p in siblings], after) if after else 0
+        posts = siblings[start:start + limit]
+        next_cursor = None
+        if start + limit < len(siblings):
+            last = posts[-1]
+            next_cursor = encode_cursor({'parent': parent, 'after': [last.created_at, last.id]})
+        return [serialize_post(post, levels) for post in posts], next_cursor
+
+    def serialize_post(post, levels):
+        if levels > 1:
+            replies, more_replies = page(post.id, None, levels - 1)
+        else:
+            replies = []
+            more_replies = encode_cursor({'parent': post.id}) if children.get(post.id) else None
         return {
             'id': post.id,
             'author_name': post.author_name,
             'content': post.content,
             'created_at': post.created_at.isoformat(),
-            'likes': post.likes,
+            'likes': post.likes + discussion_post_likes.pending(post.id),
             'is_highlighted': post.is_highlighted,
-            'replies': [serialize_post(reply) for reply in post.replies.all()]
+            'replies': replies,
+            'more_replies': more_replies
         }
 
+    posts, next_cursor = page(parent_id, after, depth)
+
     return JsonResponse({
         'topic': {
             'id': topic.id,
             'title': topic.title,
             'description': topic.description
         },
-        'posts': [serialize_post(post) for post in posts]
+        'posts': posts,
+        'next_cursor': next_cursor
     })
 
 
 @csrf_exempt
 @require_POST
 def like_discussion_post(request, post_id):
-    post = get_object_or_404(DiscussionPost, id=post_id)
-    post.likes = F('likes') + 1
-    post.save()
-    post.refresh_from_db()
+    likes = DiscussionPost.objects.filter(id=post_id).values_list('likes', flat=True).first()
+    if likes is None:
+        raise Http404('No DiscussionPost matches the given query.')
+    likes += discussion_post_likes.add(post_id, 1)
+
+    return JsonResponse({'likes': likes})
 
-    return JsonResponse({'likes': post.likes})
+
+def note_conflict_response(note, base_version):
+    data = {'error': 'Version conflict', 'version': note.version if note else 0}
+    patches = notes.patches_since(note, base_version)
+    if patches is None:
+        data['content'] = note.content
+    else:
+        data['patches'] = patches
+    return JsonResponse(data, status=409)
 
 
 @csrf_exempt
@@ -660,22 +994,22 @@ def like_discussion_post(request, post_id):
 def update_collaborative_note(request):
     data = json.loads(request.body)
 
-    note, created = CollaborativeNote.objects.get_or_create(
-        article_id=data['article_id'],
-        class_group=data['class_group']
-    )
-
-    if not created:
-        note.version += 1
-
-    note.content = data['content']
-
-    contributors = note.contributors if isinstance(note.contributors, list) else []
-    if data['contributor'] not in contributors:
-        contributors.append(data['contributor'])
-    note.contributors = contributors
-
-    note.save()
+    try:
+        base_version = int(data['base_version'])
+        patch = notes.parse_patch(data['patch'])
+        note = notes.commit_patch(data['article_id'], data['class_group'], base_version, patch, data['contributor'])
+    except notes.NoteConflict as conflict:
+        return note_conflict_response(conflict.note, conflict.base_version)
+    except (KeyError, TypeError, ValueError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    pubsub.publish(pubsub.article_channel(note.article_id), {
+        'type': 'note_patch',
+        'class_group': note.class_group,
+        'version': note.version,
+        'contributor': data['contributor'],
+        'patch': patch
+    })
 
     return JsonResponse({
         'version': note.version,
@@ -685,23 +1019,13 @@ def update_collaborative_note(request):
 
 
 @require_GET
-def get_collaborative_note(request):
+async def get_collaborative_note(request):
     article_id = request.GET.get('article_id')
     class_group = request.GET.get('class_group')
+    since = request.GET.get('since')
 
-    try:
-        note = CollaborativeNote.objects.get(
-            article_id=article_id,
-            class_group=class_group
-        )
-        return JsonResponse({
-            'content': note.content,
-            'version': note.version,
-            'contributors': note.contributors,
-            'last_edited': note.last_edited.isoformat(),
-            'is_locked': note.is_locked
-        })
-    except CollaborativeNote.DoesNotExist:
+    note = await CollaborativeNote.objects.filter(article_id=article_id, class_group=class_group).afirst()
+    if note is None:
         return JsonResponse({
             'content': '',
             'version': 0,
@@ -709,6 +1033,19 @@ def get_collaborative_note(request):
             'is_locked': False
         })
 
+    data = {
+        'version': note.version,
+        'contributors': note.contributors,
+        'last_edited': note.last_edited.isoformat(),
+        'is_locked': note.is_locked
+    }
+    patches = await notes.apatches_since(note, int(since)) if since and since.isdigit() else None
+    if patches is None:
+        data['content'] = note.content
+    else:
+        data['patches'] = patches
+    return JsonResponse(data)
+
 
 @require_GET
 def search_articles(request):
@@ -721,9 +1058,15 @@ def search_articles(request):
         Q(article_title__icontains=query) |
         Q(smart_description__icontains=query) |
         Q(group__icontains=query)
-    )
+    ).only('article_id', 'article_title', 'smart_description', 'group')
+
+    try:
+        page = keyset_paginate(articles, request, ['article_id'], default_limit=20, max_limit=100)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
 
     return JsonResponse({
+        'next_cursor': page.next_cursor,
         'results': [
             {
                 'id': a.article_id,
@@ -731,6 +1074,18 @@ def search_articles(request):
                 'description': a.smart_description,
                 'group': a.group
             }
-            for a in articles
+            for a in page.items
         ]
-    })
\ No newline at end of file
+    })
+
+
+@staff_member_required
+@require_GET
+def cache_stats(request):
+    return JsonResponse({'views': caching.cache_stats()})
+
+
+@staff_member_required
+@require_GET
+def ratelimit_stats(request):
+    return JsonResponse(ratelimit.stats())
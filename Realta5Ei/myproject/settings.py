@@ -43,7 +43,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'myapp.middleware.WhiteNoiseMiddleware',
+    'myapp.middleware.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,18 +71,113 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'myproject.wsgi.application'
+ASGI_APPLICATION = 'myproject.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# WAL lets readers run alongside the single writer; transactions start with
+# BEGIN IMMEDIATE so a writer waits on busy_timeout up front instead of failing
+# with "database is locked" when it upgrades a read lock. Compare profiles
+# with `manage.py benchmark_sqlite`.
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA mmap_size=134217728;'
+    'PRAGMA cache_size=-20000;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Page views, interactions, reactions and progress heartbeats get their
+    # own file and write lock so bursts never block content reads or quiz
+    # submissions. Create it with `manage.py migrate --database telemetry`
+    # and move existing rows over with `manage.py move_telemetry`.
+    'telemetry': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'telemetry.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=10000;'
+                'PRAGMA cache_size=-8000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['myapp.routers.TelemetryRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; switch to FileBasedCache (with a shared
+# LOCATION) when running several worker processes so invalidations are seen
+# by all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'realta5ei',
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'realta5ei-ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+
+# Write endpoint rate limits (see myapp/middleware.py): token buckets per URL
+# name, as (tokens refilled per second, burst size). Every request draws from
+# its IP address's bucket, sized for a class sharing one NAT address, and from
+# its student's bucket when the body names one. Over a limit, or with
+# WRITE_CONCURRENCY_LIMIT limited writes already in flight, requests get a 429.
+# Set RATE_LIMIT_TRUSTED_PROXIES to the number of reverse proxies that append to
+# X-Forwarded-For; with 0 the client address is REMOTE_ADDR.
+
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMIT_TRUSTED_PROXIES = 0
+RATE_LIMITS = {
+    'track_interaction': {'ip': (60, 300), 'student': (2, 20)},
+    'track_events': {'ip': (30, 150), 'student': (1, 10)},
+    'add_reaction': {'ip': (30, 100)},
+    'like_annotation': {'ip': (60, 200)},
+    'update_student_progress': {'ip': (15, 100), 'student': (0.5, 5)},
+}
+WRITE_CONCURRENCY_LIMIT = 16
+
+
+# Telemetry retention: PageView and Interaction rows older than this are
+# moved to gzip CSV files under TELEMETRY_ARCHIVE_DIR by archive_telemetry.
+
+TELEMETRY_RETENTION_DAYS = 90
+TELEMETRY_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Live updates for annotations, reactions and collaborative notes are pushed
+# over /ws/push/ (see myproject/asgi.py). The in-process broker only reaches
+# clients connected to the same worker.
+
+PUSH_BROKER = 'myapp.pubsub.InProcessBroker'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,6 +218,27 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Uploaded files and slide pages rasterized by `manage.py ingest_pdf`.
+
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+PDF_INGEST_DPI = 144
+
+# Resized WebP/JPEG copies of slide, glossary and timeline images, generated
+# on save (see myapp/images.py) or with `manage.py build_image_variants`.
+
+IMAGE_VARIANTS_ROOT = MEDIA_ROOT / 'variants'
+IMAGE_VARIANTS_URL = MEDIA_URL + 'variants/'
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280)
+IMAGE_VARIANT_WORKERS = 4
+
+# Serve MEDIA_ROOT (variants included) from Django. Off with DEBUG off, where
+# a front-end server (nginx, a CDN) should serve MEDIA_ROOT at MEDIA_URL and
+# IMAGE_VARIANTS_ROOT at IMAGE_VARIANTS_URL; deployments without one opt in
+# by setting this to True.
+SERVE_MEDIA = DEBUG
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -14,10 +14,26 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.static import serve
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('myapp.urls')),
 ]
+
+# static() only adds routes when DEBUG is on, so media is routed explicitly.
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % re.escape(url.lstrip('/')), serve, {'document_root': root}
+        )
+        for url, root in (
+            (settings.IMAGE_VARIANTS_URL, settings.IMAGE_VARIANTS_ROOT),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT),
+        )
+    ]